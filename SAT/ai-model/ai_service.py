@@ -1,17 +1,27 @@
 import os
 import pandas as pd
 import numpy as np
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from huggingface_hub import InferenceClient
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+import json
+import time
 import logging
+import threading
 
 # RAG System Imports
 from qdrant_client import QdrantClient
-from sentence_transformers import SentenceTransformer
-from predict_pipeline import run_predict_pipeline
+from predict_pipeline import run_predict_pipeline, downgrade_mode, MODES, DEFAULT_MODE
+from model_warmup import get_warmup
+from query_embeddings import QueryEmbedder
+from embedding_backend import load_embedding_model
+from rag_retrieval import retrieve
+import semantic_cache
+from semantic_cache import get_semantic_cache, context_version
+from stream_metrics import get_stream_metrics
+from prompt_budget import budget_context
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
@@ -57,25 +67,22 @@ forecast_data = None
 
 # RAG System
 rag_embedding_model = None
+query_embedder = None  # Cached, micro-batched encoder for chat queries
 qdrant_client = None
 RAG_COLLECTION_NAME = "healthcare_docs"
 
 def init_rag_system():
     """Initialize RAG system components"""
-    global rag_embedding_model, qdrant_client
+    global rag_embedding_model, query_embedder, qdrant_client
     
     try:
         logger.info("🔍 Initializing RAG system...")
         
-        # Load embedding model
+        # Load embedding model (EMBEDDING_BACKEND=onnx / onnx-int8 for the exported graph)
         model_path = "./models/all-MiniLM-L6-v2"
-        if os.path.exists(model_path):
-             rag_embedding_model = SentenceTransformer(model_path)
-             logger.info(f"✅ RAG embedding model loaded from local path: {model_path}")
-        else:
-             rag_embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-             logger.info("✅ RAG embedding model loaded from HuggingFace")
-        logger.info("✅ RAG embedding model loaded")
+        rag_embedding_model = load_embedding_model(model_path)
+        logger.info(f"✅ RAG embedding model loaded ({type(rag_embedding_model).__name__})")
+        query_embedder = QueryEmbedder(rag_embedding_model)
         
         # Connect to Qdrant
         qdrant_client = QdrantClient(path="./qdrant_data")
@@ -183,21 +190,147 @@ def get_real_time_patient_data():
             {"name": 1, "age": 1, "status": 1, "chiefComplaint": 1, "_id": 0}
         ).sort("updatedAt", -1).limit(100)) # Get last 100 active patients
         
-        # Format the data for the LLM
+        # Format the aggregates for the LLM; the patient list is fitted to the
+        # prompt budget per question (prompt_budget.budget_context)
         status_summary = ", ".join([f"{item['_id']}: {item['count']}" for item in by_status])
         high_risk_summary = ", ".join([f"{p['name']} (Score: {p.get('riskScore')}, {p.get('status')})" for p in high_risk])
-        patient_list_summary = "\n".join([f"- {p['name'].title()} ({p.get('age')}y, {p.get('status')}): {p.get('chiefComplaint', 'No complaint')}" for p in recent_patients])
         
         return {
             "total_patients": total_patients,
             "status_breakdown": status_summary,
             "high_risk_summary": high_risk_summary or "None",
-            "patient_list": patient_list_summary
+            "patients": recent_patients
         }
     except Exception as e:
         logger.error(f"❌ Error fetching patient data: {e}")
         return None
 
+CHAT_MODEL = "llama-3.3-70b-versatile"
+CHAT_COMPLETION_ARGS = dict(temperature=0.7, max_tokens=512, top_p=1, stop=None)
+
+def build_chat_prompt(user_message, role_context):
+    """
+    Messages for the Groq completion, within the CHAT_PROMPT_TOKENS budget,
+    plus the query embedding, snapshot version and prompt context the
+    semantic answer cache is keyed on.
+    """
+    # === RAG INTEGRATION ===
+    # Retrieve relevant context from knowledge base
+    rag_results = []
+    query_embedding = None
+    if query_embedder is not None and qdrant_client is not None:
+        try:
+            logger.info("🔍 Retrieving RAG context...")
+            query_embedding = query_embedder.encode(user_message)
+            
+            # Top 2 documents from the categories this role may see
+            rag_results = retrieve(qdrant_client, query_embedding, role=role_context, limit=2)
+            
+            if rag_results:
+                logger.info(f"✅ Found {len(rag_results)} relevant documents for context")
+            else:
+                logger.info("ℹ️  No relevant documents found")
+        except Exception as rag_error:
+            logger.warning(f"⚠️  RAG retrieval failed: {rag_error}")
+            # Continue without RAG context
+
+    # === REAL-TIME DATA INTEGRATION ===
+    real_time_data = get_real_time_patient_data()
+
+    # Construct Advanced System Prompt based on Role
+    base_prompt = (
+        "You are Life_Saver AI, an advanced medical forecasting assistant powered by fine-tuned models and real-world data. "
+        "Your goal is to provide precise, data-driven insights to healthcare professionals and the public. "
+        "Always maintain a professional, empathetic, and authoritative tone. "
+        "When analyzing trends, refer to specific metrics (e.g., '15% rise in ICU demand') rather than vague statements."
+    )
+    
+    role_prompts = {
+        'hospital_staff': (
+            "You are a specialized assistant for Hospital Administrators and Staff. "
+            "Focus on: ICU bed occupancy, oxygen supply chain, staffing ratios, and patient admission surges. "
+            "Prioritize patient safety and operational efficiency. "
+            "If resources are low, suggest immediate mitigation strategies like 'activating surge protocols' or 'postponing elective surgeries'."
+        ),
+        'pharmacy': (
+            "You are a specialized assistant for Pharmacy Managers. "
+            "Focus on: Inventory management, demand forecasting for critical drugs (e.g., Remdesivir, Paracetamol), and supply chain bottlenecks. "
+            "Alert users early about potential stockouts based on predicted infection trends."
+        ),
+        'admin': (
+            "You are a specialized assistant for Government Health Officials. "
+            "Focus on: Macro-level trends, regional hotspots, resource allocation across hospitals, and public health policy. "
+            "Provide high-level summaries and strategic recommendations for containment."
+        ),
+        'public': (
+            "You are a helpful health advisor for the general public. "
+            "Focus on: Personal safety measures, AQI warnings, vaccination advice, and dispelling rumors. "
+            "Keep language simple, reassuring, and actionable. Avoid medical jargon."
+        )
+    }
+    
+    system_prompt = f"{base_prompt}\n\n{role_prompts.get(role_context, role_prompts['public'])}"
+    kb_instruction = (
+        "\n\n### CONTEXT FROM KNOWLEDGE BASE ###\n"
+        "Use the following retrieved documents to answer the user's question accurately. "
+        "Cite specific details where possible.\n"
+    )
+    closing_instruction = "\n\nIMPORTANT: Answer ONLY the user's question. Do NOT simulate a conversation. Do NOT generate user responses. Stop immediately after answering."
+
+    # Fit live status and retrieved documents to the token budget, most relevant first
+    real_time_context, rag_context, budget_report = budget_context(
+        user_message, system_prompt + kb_instruction + closing_instruction, real_time_data, rag_results
+    )
+    logger.info(f"🧮 Prompt ~{budget_report['tokens']}/{budget_report['budget']} tokens: "
+                f"{budget_report['patients_listed']} patients listed, "
+                f"{budget_report['patients_summarized']} summarized, {budget_report['documents']} documents")
+    
+    # Add Real-Time Data to Prompt
+    if real_time_context:
+        system_prompt += real_time_context
+    
+    # Add RAG context instruction if available
+    if rag_context:
+        system_prompt += kb_instruction
+
+    # Construct user message with RAG context
+    enhanced_message = user_message
+    if rag_context:
+        enhanced_message = f"{user_message}{rag_context}"
+
+    # Add strict instruction to prevent hallucination
+    system_prompt += closing_instruction
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": enhanced_message}
+    ]
+
+    return {
+        "messages": messages,
+        "query_embedding": query_embedding,
+        # Any change to the patient data invalidates cached answers; the
+        # selected context only has to match
+        "cache_version": context_version(json.dumps(real_time_data, sort_keys=True, default=str)),
+        "cache_context": context_version(real_time_context, rag_context),
+    }
+
+def cached_chat_answer(role_context, prompt):
+    """Answer to a near-identical question asked against the same patient
+    snapshot and knowledge-base context, or None"""
+    if not semantic_cache.ENABLED or prompt["query_embedding"] is None:
+        return None
+    answer = get_semantic_cache().lookup(role_context, prompt["query_embedding"],
+                                         prompt["cache_version"], prompt["cache_context"])
+    if answer is not None:
+        logger.info(f"⚡ Semantic cache hit (role={role_context})")
+    return answer
+
+def store_chat_answer(role_context, prompt, answer):
+    if semantic_cache.ENABLED and prompt["query_embedding"] is not None and answer:
+        get_semantic_cache().store(role_context, prompt["query_embedding"], prompt["cache_version"],
+                                   answer, prompt["cache_context"])
+
 @app.route('/chat', methods=['POST'])
 def chat():
     """AI Chat endpoint using Groq"""
@@ -221,118 +354,22 @@ def chat():
                 "fallback_response": "System configuration error: Groq API key missing."
             }), 500
 
-        # === RAG INTEGRATION ===
-        # Retrieve relevant context from knowledge base
-        rag_context = ""
-        if rag_embedding_model is not None and qdrant_client is not None:
-            try:
-                logger.info("🔍 Retrieving RAG context...")
-                query_embedding = rag_embedding_model.encode(user_message).tolist()
-                
-                # Search for relevant documents
-                rag_results = qdrant_client.search(
-                    collection_name=RAG_COLLECTION_NAME,
-                    query_vector=query_embedding,
-                    limit=2  # Top 2 most relevant documents
-                )
-                
-                if rag_results:
-                    logger.info(f"✅ Found {len(rag_results)} relevant documents for context")
-                    rag_context = "\n\nRelevant Information from Knowledge Base:\n"
-                    for i, result in enumerate(rag_results, 1):
-                        rag_context += f"\n{i}. {result.payload['title']}: {result.payload['content'][:300]}...\n"
-                else:
-                    logger.info("ℹ️  No relevant documents found")
-            except Exception as rag_error:
-                logger.warning(f"⚠️  RAG retrieval failed: {rag_error}")
-                # Continue without RAG context
-
-        # === REAL-TIME DATA INTEGRATION ===
-        real_time_data = get_real_time_patient_data()
-        real_time_context = ""
-        if real_time_data:
-            real_time_context = (
-                "\n\n### LIVE HOSPITAL STATUS (REAL-TIME) ###\n"
-                f"- Total Patients Admitted: {real_time_data['total_patients']}\n"
-                f"- Status Breakdown: {real_time_data['status_breakdown']}\n"
-                f"- Critical/High Risk Patients: {real_time_data['high_risk_summary']}\n"
-                "\n### DETAILED PATIENT LIST ###\n"
-                f"{real_time_data.get('patient_list', 'No data')}\n\n"
-                "Use this data to answer questions about specific patients, occupancy, and status."
-            )
+        prompt = build_chat_prompt(user_message, role_context)
+        cached_answer = cached_chat_answer(role_context, prompt)
+        if cached_answer is not None:
+            return jsonify({"response": cached_answer, "cached": True})
 
-        # Construct Advanced System Prompt based on Role
-        base_prompt = (
-            "You are Life_Saver AI, an advanced medical forecasting assistant powered by fine-tuned models and real-world data. "
-            "Your goal is to provide precise, data-driven insights to healthcare professionals and the public. "
-            "Always maintain a professional, empathetic, and authoritative tone. "
-            "When analyzing trends, refer to specific metrics (e.g., '15% rise in ICU demand') rather than vague statements."
-        )
-        
-        role_prompts = {
-            'hospital_staff': (
-                "You are a specialized assistant for Hospital Administrators and Staff. "
-                "Focus on: ICU bed occupancy, oxygen supply chain, staffing ratios, and patient admission surges. "
-                "Prioritize patient safety and operational efficiency. "
-                "If resources are low, suggest immediate mitigation strategies like 'activating surge protocols' or 'postponing elective surgeries'."
-            ),
-            'pharmacy': (
-                "You are a specialized assistant for Pharmacy Managers. "
-                "Focus on: Inventory management, demand forecasting for critical drugs (e.g., Remdesivir, Paracetamol), and supply chain bottlenecks. "
-                "Alert users early about potential stockouts based on predicted infection trends."
-            ),
-            'admin': (
-                "You are a specialized assistant for Government Health Officials. "
-                "Focus on: Macro-level trends, regional hotspots, resource allocation across hospitals, and public health policy. "
-                "Provide high-level summaries and strategic recommendations for containment."
-            ),
-            'public': (
-                "You are a helpful health advisor for the general public. "
-                "Focus on: Personal safety measures, AQI warnings, vaccination advice, and dispelling rumors. "
-                "Keep language simple, reassuring, and actionable. Avoid medical jargon."
-            )
-        }
-        
-        system_prompt = f"{base_prompt}\n\n{role_prompts.get(role_context, role_prompts['public'])}"
-        
-        # Add Real-Time Data to Prompt
-        if real_time_context:
-            system_prompt += real_time_context
-        
-        # Add RAG context instruction if available
-        if rag_context:
-            system_prompt += (
-                "\n\n### CONTEXT FROM KNOWLEDGE BASE ###\n"
-                "Use the following retrieved documents to answer the user's question accurately. "
-                "Cite specific details where possible.\n"
-            )
-
-        # Construct user message with RAG context
-        enhanced_message = user_message
-        if rag_context:
-            enhanced_message = f"{user_message}{rag_context}"
-
-        # Add strict instruction to prevent hallucination
-        system_prompt += "\n\nIMPORTANT: Answer ONLY the user's question. Do NOT simulate a conversation. Do NOT generate user responses. Stop immediately after answering."
-
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": enhanced_message}
-        ]
-
-        logger.info(f"🤖 Calling Groq API: llama-3.3-70b-versatile")
+        logger.info(f"🤖 Calling Groq API: {CHAT_MODEL}")
         
         completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=messages,
-            temperature=0.7,
-            max_tokens=512,
-            top_p=1,
+            model=CHAT_MODEL,
+            messages=prompt["messages"],
             stream=False,
-            stop=None,
+            **CHAT_COMPLETION_ARGS
         )
 
         response_text = completion.choices[0].message.content
+        store_chat_answer(role_context, prompt, response_text)
 
         logger.info(f"✅ Chat response generated: {len(response_text)} chars")
         return jsonify({"response": response_text})
@@ -344,6 +381,145 @@ def chat():
             "fallback_response": "I'm having trouble connecting right now. Please try again in a moment."
         }), 500
 
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Same as /chat, streamed as Server-Sent Events:
+      event: token  data: {"text": "..."}      (repeated)
+      event: done   data: {"ttft_ms", "total_ms", "tokens", "cached"}
+      event: error  data: {"error": "..."}
+    If the client disconnects, the upstream Groq stream is closed.
+    """
+    data = request.json or {}
+    user_message = data.get('message', '')
+    role_context = data.get('role', 'public')
+    logger.info(f"💬 Streaming chat request (role={role_context}): {user_message[:50]}...")
+
+    if not user_message:
+        return jsonify({"error": "Message is required"}), 400
+
+    try:
+        client = get_groq_client()
+        if not client:
+            return jsonify({
+                "error": "Groq API key not configured. Please add GROQ_API_KEY to your .env file.",
+                "fallback_response": "System configuration error: Groq API key missing."
+            }), 500
+        prompt = build_chat_prompt(user_message, role_context)
+    except Exception as e:
+        logger.error(f"❌ Chat prompt error: {e}", exc_info=True)
+        return jsonify({"error": f"Failed to generate response: {str(e)}"}), 500
+
+    def generate():
+        started = time.perf_counter()
+        cached_answer = cached_chat_answer(role_context, prompt)
+        if cached_answer is not None:
+            yield sse_event("token", {"text": cached_answer})
+            yield sse_event("done", {"ttft_ms": 0.0, "total_ms": 0.0, "tokens": 0, "cached": True})
+            return
+
+        ttft_ms = None
+        tokens = 0
+        parts = []
+        finished = False
+        upstream = None
+        try:
+            upstream = client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=prompt["messages"],
+                stream=True,
+                **CHAT_COMPLETION_ARGS
+            )
+            for chunk in upstream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+                if usage is not None:
+                    tokens = usage.completion_tokens
+                if not delta:
+                    continue
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                if usage is None:
+                    tokens += 1  # one content delta per token until usage arrives
+                parts.append(delta)
+                yield sse_event("token", {"text": delta})
+
+            total_ms = (time.perf_counter() - started) * 1000
+            finished = True
+            store_chat_answer(role_context, prompt, "".join(parts))
+            logger.info(f"✅ Streamed {tokens} tokens (ttft {ttft_ms or 0:.0f} ms, total {total_ms:.0f} ms)")
+            yield sse_event("done", {"ttft_ms": round(ttft_ms or 0.0, 1), "total_ms": round(total_ms, 1),
+                                     "tokens": tokens, "cached": False})
+        except GeneratorExit:
+            # Client went away: stop pulling tokens from Groq
+            logger.info(f"🔌 Chat stream cancelled by client after {tokens} tokens")
+            raise
+        except Exception as e:
+            logger.error(f"❌ Chat stream error: {e}", exc_info=True)
+            yield sse_event("error", {"error": f"Failed to generate response: {str(e)}"})
+        finally:
+            if upstream is not None:
+                upstream.close()
+            get_stream_metrics().record(ttft_ms, (time.perf_counter() - started) * 1000,
+                                        tokens, cancelled=not finished)
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/chat/stream/metrics', methods=['GET'])
+def chat_stream_metrics():
+    """Time-to-first-token, duration and token counts of recent streamed chats"""
+    return jsonify(get_stream_metrics().stats())
+
+@app.route('/chat/embedding-cache', methods=['GET'])
+def embedding_cache_stats():
+    """Hit/miss and batching metrics of the chat query embedding cache"""
+    if query_embedder is None:
+        return jsonify({"error": "RAG system not initialized"}), 503
+    return jsonify(query_embedder.stats())
+
+@app.route('/chat/response-cache', methods=['GET'])
+def response_cache_stats():
+    """Hit/miss and invalidation metrics of the semantic chat answer cache"""
+    return jsonify(get_semantic_cache().stats())
+
+# --- Forecast load shedding ---
+# Concurrent pipeline runs at which requested modes are downgraded
+STANDARD_MODE_LOAD = int(os.getenv("PIPELINE_STANDARD_LOAD", "4"))
+FAST_MODE_LOAD = int(os.getenv("PIPELINE_FAST_LOAD", "8"))
+_pipelines_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+def run_pipeline_under_load(role, horizon, mode, hospital_id=None):
+    """
+    Run the pipeline, downgrading `mode` while many runs are in flight.
+    Forecasts are tracked per `hospital_id` when given, so POST /predict/actuals
+    with the same hospital_id scores them.
+    """
+    from online_weights import GLOBAL_KEY
+    global _pipelines_in_flight
+    with _in_flight_lock:
+        in_flight = _pipelines_in_flight
+        _pipelines_in_flight += 1
+    try:
+        effective = downgrade_mode(mode, in_flight, STANDARD_MODE_LOAD, FAST_MODE_LOAD)
+        if effective != mode:
+            logger.warning(f"⬇️  {in_flight} forecasts in flight: {mode} -> {effective} mode")
+        result = run_predict_pipeline(role=role, hf_token=os.getenv("HF_TOKEN"),
+                                      horizon=horizon, mode=effective,
+                                      series_key=hospital_id or GLOBAL_KEY)
+        if hospital_id:
+            result['hospital_id'] = hospital_id
+        if effective != mode:
+            result['requested_mode'] = mode
+        return result
+    finally:
+        with _in_flight_lock:
+            _pipelines_in_flight -= 1
+
 @app.route('/predict/final', methods=['GET'])
 def predict_final():
     """
@@ -351,17 +527,23 @@ def predict_final():
     Query params:
     - role: 'public', 'hospital_staff', 'pharmacy', 'admin'
     - horizon: int (default 14)
+    - mode: 'fast' (~0.5s), 'standard' (~1.5s) or 'full' (default, up to ~30s)
+    - hospital_id: optional, tracks ensemble accuracy for this hospital
     """
     try:
         role = request.args.get('role', 'public')
         horizon = int(request.args.get('horizon', 14))
+        mode = request.args.get('mode', DEFAULT_MODE)
+        hospital_id = request.args.get('hospital_id')
+        if mode not in MODES:
+            return jsonify({"error": f"Invalid mode. Must be one of: {', '.join(MODES)}"}), 400
         
-        logger.info(f"🚀 Forecast request received: role={role}, horizon={horizon}")
+        logger.info(f"🚀 Forecast request received: role={role}, horizon={horizon}, mode={mode}")
+        get_warmup().note_traffic()
         
-        # Run the full pipeline
+        # Run the pipeline
         logger.info("🔄 Starting multi-model pipeline...")
-        hf_token = os.getenv("HF_TOKEN")
-        result = run_predict_pipeline(role=role, hf_token=hf_token, horizon=horizon)
+        result = run_pipeline_under_load(role, horizon, mode, hospital_id)
         
         logger.info(f"✅ Forecast complete! Ensemble Confidence: {result.get('ensemble_confidence', 0):.2%}")
         return jsonify(result)
@@ -379,11 +561,15 @@ def predict_pipeline_endpoint():
         data = request.json
         role = data.get('role', 'public')
         horizon = data.get('horizon', 14)
+        mode = data.get('mode', DEFAULT_MODE)
+        hospital_id = data.get('hospital_id')
+        if mode not in MODES:
+            return jsonify({"error": f"Invalid mode. Must be one of: {', '.join(MODES)}"}), 400
         
-        logger.info(f"🚀 Pipeline request received: role={role}, horizon={horizon}")
+        logger.info(f"🚀 Pipeline request received: role={role}, horizon={horizon}, mode={mode}")
+        get_warmup().note_traffic()
         
-        hf_token = os.getenv("HF_TOKEN")
-        result = run_predict_pipeline(role=role, hf_token=hf_token, horizon=horizon)
+        result = run_pipeline_under_load(role, horizon, mode, hospital_id)
         
         return jsonify(result)
 
@@ -391,6 +577,81 @@ def predict_pipeline_endpoint():
         logger.error(f"❌ Pipeline error: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
+@app.route('/predict/actuals', methods=['POST'])
+def record_actuals():
+    """
+    Feed realized admissions so ensemble weights adapt online.
+    Body: { date: 'YYYY-MM-DD', value: number, hospital_id?: str }
+       or { actuals: [{date, value}, ...], hospital_id?: str }
+    """
+    try:
+        from online_weights import get_tracker, GLOBAL_KEY
+        data = request.json or {}
+        series_key = data.get('hospital_id') or GLOBAL_KEY
+        actuals = data.get('actuals') or [{"date": data.get('date'), "value": data.get('value')}]
+
+        if any(a.get('date') is None or a.get('value') is None for a in actuals):
+            return jsonify({"error": "Each actual needs a date and a value"}), 400
+
+        actuals = sorted(actuals, key=lambda a: str(a['date']))
+        tracker = get_tracker()
+        scored = tracker.observe_actuals(
+            [a['date'] for a in actuals],
+            [float(a['value']) for a in actuals],
+            series_key=series_key
+        )
+
+        logger.info(f"📏 Recorded {len(actuals)} actuals for {series_key} ({scored} scored)")
+        return jsonify({"scored": scored, "model_performance": tracker.summary(series_key)})
+    except Exception as e:
+        logger.error(f"❌ Actuals error: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+# --- MODEL VERSION ENDPOINTS ---
+import model_registry
+
+@app.route('/models/version', methods=['GET'])
+def model_version():
+    """Currently promoted model bundle and the versions available for rollback"""
+    pointer = model_registry.read_pointer() or {}
+    return jsonify({
+        "current": pointer.get('current'),
+        "previous": pointer.get('previous'),
+        "available": model_registry.list_versions()
+    })
+
+@app.route('/models/rollback', methods=['POST'])
+def model_rollback():
+    """
+    Point serving back at the previous bundle (or at body.version if given).
+    The forecast path picks the change up on its next request.
+    """
+    try:
+        data = request.json or {}
+        version = data.get('version')
+        if version:
+            active = model_registry.promote(version)
+        else:
+            active = model_registry.rollback()
+        logger.info(f"🔀 Model version switched to {active}")
+        return jsonify({"current": active})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"❌ Model rollback error: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/models/health', methods=['GET'])
+def model_health():
+    """Circuit state, rolling error rate and latency of each remote forecaster"""
+    from model_health import get_model_health
+    return jsonify(get_model_health().status())
+
+@app.route('/models/warmup', methods=['GET'])
+def model_warmup_status():
+    """Readiness of each remote forecaster as seen by the warm-up scheduler"""
+    return jsonify(get_warmup().status())
+
 # --- AGENTIC ENDPOINTS ---
 from agents.orchestrator import DecisionOrchestrator
 orchestrator = DecisionOrchestrator()
@@ -427,6 +688,8 @@ if __name__ == '__main__':
     # Prevent double initialization in debug mode
     if os.environ.get("WERKZEUG_RUN_MAIN") == "true" or not app.debug:
          init_rag_system()  # Initialize RAG system
+         if os.getenv("WARMUP_ENABLED", "1") != "0":
+             get_warmup().start()  # Keep remote forecasters warm
     
     logger.info("🌐 CORS enabled for: http://localhost:5001")
     logger.info("🔧 Debug mode: ENABLED")
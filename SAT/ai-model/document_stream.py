@@ -0,0 +1,102 @@
+"""
+Streaming document source for RAG ingestion.
+
+Walks a directory of text SOPs and PDFs and yields token-bounded, overlapping
+chunks one at a time, so only the file being chunked is ever held in memory.
+Chunk boundaries are measured with the embedding model's own tokenizer, so no
+chunk is silently truncated by the encoder.
+"""
+
+import os
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = ('.txt', '.md')
+PDF_EXTENSIONS = ('.pdf',)
+
+# MiniLM truncates at 256 word pieces; leave room for [CLS]/[SEP] and the title
+CHUNK_TOKENS = 200
+CHUNK_OVERLAP = 40
+
+
+def iter_files(root, extensions=TEXT_EXTENSIONS + PDF_EXTENSIONS):
+    """Files under `root` with a supported extension, in a stable order"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(extensions) and not name.startswith('.'):
+                yield os.path.join(dirpath, name)
+
+
+def file_signature(path):
+    """sha256 of the file bytes, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_text(path):
+    """Plain text of a document; PDFs need the optional pypdf package"""
+    if path.lower().endswith(PDF_EXTENSIONS):
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            logger.warning(f"⚠️  pypdf not installed, skipping {path}")
+            return ""
+        reader = PdfReader(path)
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def chunk_text(text, tokenizer, max_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    """
+    Yield chunks of at most `max_tokens` tokens, each starting `overlap`
+    tokens before the previous one ended. Chunks are cut from the original
+    text using the tokenizer's character offsets.
+    """
+    if overlap >= max_tokens:
+        raise ValueError("overlap must be smaller than max_tokens")
+    if not text.strip():
+        return
+    # Whole-document tokenization is expected to exceed the model limit
+    offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True,
+                        truncation=False, verbose=False)['offset_mapping']
+    if not offsets:
+        return
+    step = max_tokens - overlap
+    start = 0
+    while True:
+        end = min(start + max_tokens, len(offsets))
+        chunk = text[offsets[start][0]:offsets[end - 1][1]].strip()
+        if chunk:
+            yield chunk
+        if end == len(offsets):
+            return
+        start += step
+
+
+def document_category(root, path):
+    """Top-level sub-directory of `root` the file lives in ('documents' at the root)"""
+    relative = os.path.relpath(path, root)
+    parts = relative.split(os.sep)
+    return parts[0] if len(parts) > 1 else 'documents'
+
+
+def iter_file_chunks(root, path, tokenizer, max_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    """Chunk documents of one file, in the shape ingest_documents expects"""
+    relative = os.path.relpath(path, root)
+    title = os.path.splitext(os.path.basename(path))[0].replace('_', ' ')
+    category = document_category(root, path)
+    for i, chunk in enumerate(chunk_text(read_text(path), tokenizer, max_tokens, overlap)):
+        yield {
+            "key": f"{relative}#{i}",
+            "category": category,
+            "title": title,
+            "content": chunk,
+            "source": relative,
+        }
@@ -8,3 +8,17 @@ print(f"Downloading {model_name}...")
 model = SentenceTransformer(model_name)
 model.save(save_path)
 print(f"Model saved to {save_path}")
+
+# Optional: ONNX + int8 exports for EMBEDDING_BACKEND=onnx / onnx-int8 (embedding_backend.py)
+if os.getenv("EXPORT_ONNX") == "1":
+    from embedding_backend import export_onnx
+    export_onnx(save_path)
+    print(f"ONNX models saved to {save_path}/onnx")
+
+# Optional: Chronos checkpoint for the in-process forecaster runtime (local_runtime.py)
+if os.getenv("DOWNLOAD_FORECASTERS") == "1":
+    from huggingface_hub import snapshot_download
+    forecaster_path = './models/chronos-t5-base'
+    print("Downloading amazon/chronos-t5-base...")
+    snapshot_download("amazon/chronos-t5-base", local_dir=forecaster_path)
+    print(f"Forecaster saved to {forecaster_path}")
@@ -0,0 +1,197 @@
+"""
+Embedding backends for the RAG MiniLM model.
+
+The default backend is the PyTorch SentenceTransformer. On CPU-only nodes the
+same checkpoint can instead run through onnxruntime, optionally with int8
+dynamic quantization, using the checkpoint's own tokenizer and the same mean
+pooling + L2 normalization as the sentence-transformers pipeline.
+
+Environment:
+    EMBEDDING_BACKEND   'torch' (default), 'onnx' or 'onnx-int8'
+
+Usage:
+    python embedding_backend.py --export          # write onnx/model.onnx and model_int8.onnx
+    python embedding_backend.py --check --bench   # parity vs torch and per-query latency
+"""
+
+import os
+import time
+import logging
+import argparse
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "models", "all-MiniLM-L6-v2")
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+ONNX_FILES = {'onnx': 'model.onnx', 'onnx-int8': 'model_int8.onnx'}
+MAX_SEQ_LENGTH = 256
+# Lowest acceptable cosine similarity between torch and ONNX embeddings
+PARITY_THRESHOLD = {'onnx': 0.9999, 'onnx-int8': 0.98}
+
+SAMPLE_QUERIES = [
+    "What is the ICU capacity threshold?",
+    "How much paracetamol stock do we maintain?",
+    "What is the budget allocation for staffing?",
+    "When should surge capacity protocols be activated?",
+    "Masks recommended when AQI is above what level?",
+]
+
+
+def onnx_path(model_path, backend):
+    return os.path.join(model_path, "onnx", ONNX_FILES[backend])
+
+
+class OnnxSentenceEncoder:
+    """
+    Drop-in for SentenceTransformer.encode on an exported ONNX graph:
+    tokenize, run the transformer, mean-pool over the attention mask, normalize.
+    """
+
+    def __init__(self, model_path, backend='onnx', threads=None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.max_seq_length = MAX_SEQ_LENGTH
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(onnx_path(model_path, backend), options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, normalize_embeddings=True, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        outputs = []
+        for i in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(texts[i:i + batch_size], padding=True, truncation=True,
+                                     max_length=self.max_seq_length, return_tensors="np")
+            feed = {k: v.astype(np.int64) for k, v in encoded.items() if k in self.input_names}
+            token_embeddings = self.session.run(None, feed)[0]
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            outputs.append(pooled.astype(np.float32))
+        embeddings = np.concatenate(outputs) if outputs else np.zeros((0, 384), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+
+def load_embedding_model(model_path=None, backend=None):
+    """
+    SentenceTransformer or OnnxSentenceEncoder for the MiniLM checkpoint.
+    Falls back to torch if the ONNX export or onnxruntime is missing.
+    """
+    backend = backend or os.getenv("EMBEDDING_BACKEND", "torch")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Choose from {list(BACKENDS)}")
+    model_path = model_path or MODEL_PATH
+
+    if backend != 'torch':
+        try:
+            model = OnnxSentenceEncoder(model_path, backend)
+            logger.info(f"✅ Embedding backend: {backend} ({onnx_path(model_path, backend)})")
+            return model
+        except Exception as e:
+            logger.warning(f"⚠️  {backend} embedding backend unavailable ({e}), using torch")
+
+    from sentence_transformers import SentenceTransformer
+    if os.path.exists(model_path):
+        return SentenceTransformer(model_path)
+    return SentenceTransformer('all-MiniLM-L6-v2')
+
+
+def export_onnx(model_path=None, quantize=True):
+    """Export the checkpoint's transformer to ONNX (and an int8 dynamic-quantized copy)"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    model_path = model_path or MODEL_PATH
+    os.makedirs(os.path.join(model_path, "onnx"), exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    transformer = AutoModel.from_pretrained(model_path)
+    transformer.eval()
+
+    class Wrapper(torch.nn.Module):
+        # Keyword call keeps the graph independent of forward()'s argument order
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.inner(input_ids=input_ids, attention_mask=attention_mask,
+                              token_type_ids=token_type_ids).last_hidden_state
+
+    model = Wrapper(transformer)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic = {name: {0: "batch", 1: "sequence"} for name in names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    target = onnx_path(model_path, 'onnx')
+    with torch.no_grad():
+        torch.onnx.export(
+            model, (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            target, input_names=names, output_names=["last_hidden_state"],
+            dynamic_axes=dynamic, opset_version=17, dynamo=False
+        )
+    logger.info(f"📦 Exported {target}")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantized = onnx_path(model_path, 'onnx-int8')
+        quantize_dynamic(target, quantized, weight_type=QuantType.QInt8)
+        logger.info(f"🗜️  Quantized {quantized}")
+
+
+def parity_check(model_path=None, backend='onnx', texts=SAMPLE_QUERIES):
+    """Cosine similarity between torch and `backend` embeddings of `texts`"""
+    reference = load_embedding_model(model_path, 'torch').encode(texts, convert_to_numpy=True,
+                                                                show_progress_bar=False)
+    candidate = OnnxSentenceEncoder(model_path or MODEL_PATH, backend).encode(texts)
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    cosine = (reference * candidate).sum(axis=1)
+    return {"min_cosine": float(cosine.min()), "mean_cosine": float(cosine.mean()),
+            "passed": bool(cosine.min() >= PARITY_THRESHOLD[backend])}
+
+
+def benchmark(model_path=None, backends=BACKENDS, texts=SAMPLE_QUERIES, repeats=20):
+    """Median single-query latency (ms) per backend, as /chat calls it"""
+    results = {}
+    for backend in backends:
+        if backend == 'torch':
+            model = load_embedding_model(model_path, 'torch')
+        else:
+            model = OnnxSentenceEncoder(model_path or MODEL_PATH, backend)
+        model.encode(texts[0], show_progress_bar=False)  # warm-up
+        timings = []
+        for _ in range(repeats):
+            for text in texts:
+                start = time.perf_counter()
+                model.encode(text, show_progress_bar=False)
+                timings.append((time.perf_counter() - start) * 1000)
+        results[backend] = round(float(np.median(timings)), 2)
+    return results
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="ONNX / int8 backends for the RAG embedding model")
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--export", action="store_true", help="export ONNX and int8 models")
+    parser.add_argument("--check", action="store_true", help="cosine parity against torch")
+    parser.add_argument("--bench", action="store_true", help="per-query latency of each backend")
+    args = parser.parse_args()
+
+    if args.export:
+        export_onnx(args.model_path)
+    if args.check:
+        for backend in ('onnx', 'onnx-int8'):
+            print(f"{backend}: {parity_check(args.model_path, backend)}")
+    if args.bench:
+        for backend, ms in benchmark(args.model_path).items():
+            print(f"{backend:10s} {ms:8.2f} ms/query")
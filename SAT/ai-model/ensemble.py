@@ -1,35 +1,98 @@
-def run_ensemble(forecasts):
+import numpy as np
+
+DEFAULT_WEIGHTS = {
+    'CustomTrained': 0.3,
+    'PatchTST': 0.2,
+    'MOIRAI': 0.15,
+    'TFT': 0.15,
+    'TimesFM': 0.1,
+    'LagLlama': 0.05,
+    'NeuralProphet': 0.05
+}
+
+def stack_forecasts(forecasts, model_names=None, horizon=None):
+    """
+    Stack per-model forecasts into an (n_models, n_series, horizon) array.
+
+    forecasts: dict of model_name -> values, where values is either one series
+               (horizon,) or a batch (n_series, horizon)
+    Missing or short forecasts are padded with NaN so they can be masked out.
+
+    Returns (stack, model_names)
+    """
+    if model_names is None:
+        model_names = list(forecasts.keys())
+
+    arrays = [np.atleast_2d(np.asarray(forecasts[m], dtype=float)) for m in model_names]
+    n_series = max(a.shape[0] for a in arrays)
+    if horizon is None:
+        horizon = max(a.shape[1] for a in arrays)
+
+    stack = np.full((len(model_names), n_series, horizon), np.nan)
+    for i, a in enumerate(arrays):
+        steps = min(a.shape[1], horizon)
+        stack[i, :a.shape[0], :steps] = a[:, :steps]
+
+    return stack, model_names
+
+def combine_forecasts(stack, weights):
+    """
+    Weighted combination of a forecast stack in one vectorized pass.
+
+    Args:
+        stack: (n_models, n_series, horizon) array, NaN where a model has no value
+        weights: (n_models,) or (n_models, n_series) non-negative weights
+
+    Returns:
+        combined: (n_series, horizon) weighted mean over the available models
+                  (0 where no weighted model is available)
+        spread: (n_series, horizon) weighted standard deviation across models
+    """
+    stack = np.asarray(stack, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    if weights.ndim == 1:
+        weights = weights[:, None]
+    weights = np.broadcast_to(weights[:, :, None], stack.shape)
+
+    available = ~np.isnan(stack)
+    effective = np.where(available, weights, 0.0)
+    total = effective.sum(axis=0)
+    safe_total = np.where(total > 0, total, 1.0)
+    norm = effective / safe_total
+
+    values = np.where(available, stack, 0.0)
+    combined = (norm * values).sum(axis=0)
+    variance = (norm * (values - combined) ** 2).sum(axis=0)
+
+    combined = np.where(total > 0, combined, 0.0)
+    spread = np.where(total > 0, np.sqrt(variance), 0.0)
+    return combined, spread
+
+def run_ensemble(forecasts, weights=None, return_spread=False):
     """
     Combines forecasts from multiple models using weighted averaging.
-    forecasts: dict of model_name -> list of values
+    forecasts: dict of model_name -> list of values (one series) or
+               (n_series, horizon) arrays (batch of series)
+    weights: dict of model_name -> weight (defaults to DEFAULT_WEIGHTS);
+             models without a weight are ignored
     """
-    final_values = []
     if not forecasts:
-        return []
-        
-    num_steps = len(list(forecasts.values())[0])
-    
-    weights = {
-        'CustomTrained': 0.3,
-        'PatchTST': 0.2,
-        'MOIRAI': 0.15,
-        'TFT': 0.15,
-        'TimesFM': 0.1,
-        'LagLlama': 0.05,
-        'NeuralProphet': 0.05
-    }
-    
-    for i in range(num_steps):
-        weighted_sum = 0
-        total_weight = 0
-        for model, values in forecasts.items():
-            if model in weights and i < len(values):
-                weighted_sum += values[i] * weights[model]
-                total_weight += weights[model]
-        
-        if total_weight > 0:
-            final_values.append(weighted_sum / total_weight)
-        else:
-            final_values.append(0)
-            
-    return final_values
+        return ([], []) if return_spread else []
+
+    if weights is None:
+        weights = DEFAULT_WEIGHTS
+
+    first = np.asarray(next(iter(forecasts.values())), dtype=float)
+    batched = first.ndim == 2
+    horizon = first.shape[-1]
+
+    stack, model_names = stack_forecasts(forecasts, horizon=horizon)
+    weight_vector = np.array([weights.get(m, 0.0) for m in model_names], dtype=float)
+    combined, spread = combine_forecasts(stack, weight_vector)
+
+    if not batched:
+        combined, spread = combined[0].tolist(), spread[0].tolist()
+
+    if return_spread:
+        return combined, spread
+    return combined
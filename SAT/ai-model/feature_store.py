@@ -0,0 +1,175 @@
+"""
+Shared lag/rolling feature engineering for training and serving.
+
+Both `train_model.py` and `model_trained.py` build their features through this
+module so the definitions can never drift apart. The computed feature matrix for
+the master data is persisted keyed by a fingerprint of the driver series and is
+extended incrementally when new rows are appended.
+"""
+
+import os
+import hashlib
+import logging
+
+import joblib
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+LAGS = [1, 7, 14, 30]
+ROLLING_WINDOWS = [7, 30]
+TIME_FEATURES = ['day_of_week', 'month']
+
+# Rows of history needed to compute features for one new row
+WARMUP_ROWS = max(max(LAGS), max(ROLLING_WINDOWS) + 1)
+
+FEATURE_STORE_DIR = os.path.join(os.path.dirname(__file__), "feature_store")
+
+
+def feature_columns():
+    """Ordered list of engineered feature names"""
+    return (
+        list(TIME_FEATURES)
+        + [f'lag_{lag}' for lag in LAGS]
+        + [f'rolling_mean_{window}' for window in ROLLING_WINDOWS]
+    )
+
+
+def resolve_driver_column(df):
+    """
+    Pick the series that drives the autoregressive features.
+    Serving always feeds admissions, so prefer that when present.
+    """
+    for col in ['new_admissions', 'value', 'admissions', 'count', 'demand', 'y']:
+        if col in df.columns:
+            return col
+
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    if len(numeric_cols) > 0:
+        return numeric_cols[-1]
+    raise ValueError("No suitable target column found in data")
+
+
+def compute_features(dates, values):
+    """
+    Compute the engineered features for a whole series.
+
+    Lags and rolling means only look at values strictly before each row, which
+    is exactly what is available when forecasting the next day.
+    """
+    dates = pd.to_datetime(pd.Series(dates)).reset_index(drop=True)
+    series = pd.Series(values, dtype=float).reset_index(drop=True)
+
+    features = pd.DataFrame(index=series.index)
+    features['day_of_week'] = dates.dt.dayofweek
+    features['month'] = dates.dt.month
+
+    for lag in LAGS:
+        features[f'lag_{lag}'] = series.shift(lag)
+
+    previous = series.shift(1)
+    for window in ROLLING_WINDOWS:
+        features[f'rolling_mean_{window}'] = previous.rolling(window=window).mean()
+
+    return features[feature_columns()]
+
+
+def build_inference_row(history, date):
+    """
+    Compute the features for the day after `history` ends.
+    Matches `compute_features` for sequences longer than the warm-up window and
+    falls back to the earliest value / overall mean for short histories.
+    """
+    history = list(history)
+    row = {
+        'day_of_week': date.weekday(),
+        'month': date.month,
+    }
+
+    for lag in LAGS:
+        if len(history) >= lag:
+            row[f'lag_{lag}'] = history[-lag]
+        else:
+            row[f'lag_{lag}'] = history[0] if history else 0
+
+    for window in ROLLING_WINDOWS:
+        if len(history) >= window:
+            row[f'rolling_mean_{window}'] = float(np.mean(history[-window:]))
+        else:
+            row[f'rolling_mean_{window}'] = float(np.mean(history)) if history else 0
+
+    return row
+
+
+def data_fingerprint(dates, values):
+    """Stable hash of the (date, value) pairs a feature matrix was built from"""
+    frame = pd.DataFrame({
+        'date': pd.to_datetime(pd.Series(dates)).reset_index(drop=True),
+        'value': pd.Series(values, dtype=float).reset_index(drop=True),
+    })
+    hashed = pd.util.hash_pandas_object(frame, index=False).values
+    return hashlib.sha256(hashed.tobytes()).hexdigest()
+
+
+def _store_path(driver_col):
+    return os.path.join(FEATURE_STORE_DIR, f"features_{driver_col}.joblib")
+
+
+def _load_entry(driver_col):
+    path = _store_path(driver_col)
+    if not os.path.exists(path):
+        return None
+    try:
+        return joblib.load(path)
+    except Exception as e:
+        logger.warning(f"⚠️  Could not read feature store {path}: {e}")
+        return None
+
+
+def _save_entry(driver_col, entry):
+    os.makedirs(FEATURE_STORE_DIR, exist_ok=True)
+    path = _store_path(driver_col)
+    tmp_path = f"{path}.tmp"
+    joblib.dump(entry, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_or_build_features(df, driver_col):
+    """
+    Return the feature matrix for `df` (sorted by date), aligned row by row.
+
+    - Same data as last time: served straight from the store.
+    - Rows appended since last time: only the new rows are computed.
+    - Anything else (history corrected, new file): full recompute.
+    """
+    dates = df['date'].reset_index(drop=True)
+    values = df[driver_col].reset_index(drop=True)
+    fingerprint = data_fingerprint(dates, values)
+
+    entry = _load_entry(driver_col)
+    if entry is not None and entry['fingerprint'] == fingerprint:
+        logger.info(f"✅ Feature store hit for {driver_col} ({len(values)} rows)")
+        return entry['features'].copy()
+
+    n_cached = entry['n_rows'] if entry is not None else 0
+    if (
+        entry is not None
+        and 0 < n_cached < len(values)
+        and data_fingerprint(dates[:n_cached], values[:n_cached]) == entry['fingerprint']
+    ):
+        start = max(0, n_cached - WARMUP_ROWS)
+        tail = compute_features(dates[start:], values[start:])
+        new_rows = tail.iloc[n_cached - start:]
+        features = pd.concat([entry['features'], new_rows], ignore_index=True)
+        logger.info(f"➕ Feature store extended for {driver_col}: {len(new_rows)} new rows")
+    else:
+        features = compute_features(dates, values)
+        logger.info(f"🔧 Feature store rebuilt for {driver_col} ({len(values)} rows)")
+
+    _save_entry(driver_col, {
+        'fingerprint': fingerprint,
+        'n_rows': len(values),
+        'features': features,
+    })
+    return features.copy()
@@ -4,24 +4,53 @@ Creates embeddings and stores them in Qdrant vector database
 """
 
 import os
+import json
+import time
+import queue
+import hashlib
+import threading
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from sentence_transformers import SentenceTransformer
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, PointIdsList,
+    Filter, FieldCondition, MatchValue, IsEmptyCondition, PayloadField
+)
+from embedding_backend import load_embedding_model
+from quantize_collection import quantization_config, search_params, QUANTIZATION
+from rag_retrieval import create_payload_indexes
+from document_stream import iter_files, file_signature, iter_file_chunks, CHUNK_TOKENS, CHUNK_OVERLAP
 import uuid
 
-# Initialize embedding model
+# Initialize embedding model (EMBEDDING_BACKEND selects torch / onnx / onnx-int8)
 print("Loading embedding model...")
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')  # Fast, efficient model
+embedding_model = load_embedding_model()  # Fast, efficient model
 EMBEDDING_DIM = 384  # Dimension for all-MiniLM-L6-v2
 
-# Initialize Qdrant client (local instance)
+# Initialize Qdrant client (server if QDRANT_URL is set, otherwise local instance)
 print("Connecting to Qdrant...")
-qdrant_client = QdrantClient(path="./qdrant_data")  # Local storage
+QDRANT_URL = os.getenv("QDRANT_URL")
+qdrant_client = QdrantClient(url=QDRANT_URL) if QDRANT_URL else QdrantClient(path="./qdrant_data")
 
 # Collection name
 COLLECTION_NAME = "healthcare_docs"
 
+# Throughput knobs (overridable on the command line)
+EMBED_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+ENCODE_PROCESSES = int(os.getenv("INGEST_PROCESSES", "0"))  # >1 uses a multi-process pool
+UPSERT_CHUNK_SIZE = int(os.getenv("INGEST_UPSERT_CHUNK", "256"))
+UPSERT_WORKERS = int(os.getenv("INGEST_UPSERT_WORKERS", "4"))
+
+# Streaming directory ingestion: embedded batches allowed to wait for upsert
+# workers before the reader blocks, and checkpoint flush frequency (files)
+MAX_PENDING_BATCHES = int(os.getenv("INGEST_MAX_PENDING", "4"))
+CHECKPOINT_EVERY = 20
+CHECKPOINT_PATH = os.getenv("INGEST_CHECKPOINT", "./ingest_checkpoint.json")
+
+# Namespace for deterministic point ids (uuid5 of document key + content hash)
+POINT_ID_NAMESPACE = uuid.UUID("6f1c2a4e-58d3-4b8e-9a61-3c0f7d2b9e14")
+
 def create_collection():
     """Create Qdrant collection if it doesn't exist"""
     try:
@@ -29,11 +58,15 @@ def create_collection():
         print(f"Collection '{COLLECTION_NAME}' already exists")
     except:
         print(f"Creating collection '{COLLECTION_NAME}'...")
+        # Quantized copy in RAM, float32 originals on disk for rescoring
         qdrant_client.create_collection(
             collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE)
+            vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE,
+                                        on_disk=QUANTIZATION != 'none'),
+            quantization_config=quantization_config(QUANTIZATION)
         )
-        print("Collection created successfully")
+        print(f"Collection created successfully ({QUANTIZATION} quantization)")
+    create_payload_indexes(qdrant_client, COLLECTION_NAME)
 
 def prepare_documents() -> List[Dict]:
     """Prepare healthcare knowledge base documents"""
@@ -151,43 +184,163 @@ def prepare_documents() -> List[Dict]:
     
     return documents
 
-def ingest_documents():
-    """Ingest documents into Qdrant"""
+def embed_texts(texts, batch_size=EMBED_BATCH_SIZE, processes=ENCODE_PROCESSES):
+    """
+    Encode `texts` in batches of `batch_size`. With processes > 1 the batches
+    are spread over a multi-process encoding pool. Returns an (n, dim) array.
+    """
+    start = time.perf_counter()
+    # The multi-process pool is a SentenceTransformer (torch backend) feature
+    if processes and processes > 1 and hasattr(embedding_model, "start_multi_process_pool"):
+        pool = embedding_model.start_multi_process_pool(["cpu"] * processes)
+        try:
+            embeddings = embedding_model.encode_multi_process(texts, pool, batch_size=batch_size)
+        finally:
+            embedding_model.stop_multi_process_pool(pool)
+    else:
+        embeddings = embedding_model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+    elapsed = time.perf_counter() - start
+    print(f"  Encoded {len(texts)} texts in {elapsed:.2f}s "
+          f"({len(texts) / max(elapsed, 1e-9):.0f} texts/s, batch={batch_size}, processes={processes or 1})")
+    return embeddings
+
+def upsert_points(points, chunk_size=UPSERT_CHUNK_SIZE, workers=UPSERT_WORKERS):
+    """
+    Upsert `points` in chunks of `chunk_size` with up to `workers` requests in
+    flight. The embedded (path=...) client is single-writer, so it always uses
+    one worker; parallel requests need a Qdrant server (QDRANT_URL).
+    """
+    if not points:
+        return
+    if not QDRANT_URL:
+        workers = 1
+    chunks = [points[i:i + chunk_size] for i in range(0, len(points), chunk_size)]
+    start = time.perf_counter()
+
+    def send(chunk):
+        qdrant_client.upsert(collection_name=COLLECTION_NAME, points=chunk, wait=True)
+        return len(chunk)
+
+    if workers <= 1:
+        for chunk in chunks:
+            send(chunk)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Raises the first failed chunk's exception
+            list(executor.map(send, chunks))
+
+    elapsed = time.perf_counter() - start
+    print(f"  Upserted {len(points)} points in {len(chunks)} chunks in {elapsed:.2f}s "
+          f"({len(points) / max(elapsed, 1e-9):.0f} points/s, workers={workers})")
+
+def document_key(doc):
+    """Stable identity of a document across runs (explicit 'key', else category/title)"""
+    return doc.get("key") or f"{doc['category']}/{doc['title']}"
+
+def content_hash(doc):
+    digest = hashlib.sha256()
+    for field in ("category", "title", "content"):
+        digest.update(doc[field].encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def point_id(doc_key, doc_hash):
+    """Deterministic point id: same document + same content -> same id"""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{doc_key}:{doc_hash}"))
+
+def document_text(doc):
+    # Combine title and content for embedding
+    return f"{doc['title']}. {doc['content']}"
+
+def build_points(docs, embeddings, source_root=None):
+    points = []
+    for doc, embedding in zip(docs, embeddings):
+        key = document_key(doc)
+        doc_hash = content_hash(doc)
+        payload = {
+            "doc_key": key,
+            "content_hash": doc_hash,
+            "category": doc["category"],
+            "title": doc["title"],
+            "content": doc["content"],
+            "text": document_text(doc)
+        }
+        if source_root:
+            payload["source"] = doc.get("source")
+            payload["source_root"] = source_root
+        points.append(PointStruct(id=point_id(key, doc_hash), vector=embedding.tolist(), payload=payload))
+    return points
+
+def source_filter(source_root=None):
+    """Points ingested from `source_root`, or the built-in documents when None"""
+    if source_root:
+        return Filter(must=[FieldCondition(key="source_root", match=MatchValue(value=source_root))])
+    return Filter(must=[IsEmptyCondition(is_empty=PayloadField(key="source_root"))])
+
+def stored_point_ids(source_root=None):
+    """Ids of the stored points from one source (payloads and vectors not fetched)"""
+    ids = set()
+    offset = None
+    while True:
+        records, offset = qdrant_client.scroll(
+            collection_name=COLLECTION_NAME, scroll_filter=source_filter(source_root),
+            limit=1024, offset=offset, with_payload=False, with_vectors=False
+        )
+        ids.update(str(record.id) for record in records)
+        if offset is None:
+            return ids
+
+def delete_points(ids, chunk_size=UPSERT_CHUNK_SIZE):
+    ids = list(ids)
+    for i in range(0, len(ids), chunk_size):
+        qdrant_client.delete(
+            collection_name=COLLECTION_NAME,
+            points_selector=PointIdsList(points=ids[i:i + chunk_size]),
+            wait=True
+        )
+
+def ingest_documents(documents=None, batch_size=EMBED_BATCH_SIZE, processes=ENCODE_PROCESSES,
+                     chunk_size=UPSERT_CHUNK_SIZE, workers=UPSERT_WORKERS):
+    """
+    Sync documents into Qdrant: embed and upsert only new or changed documents,
+    delete points whose document was changed or removed. Returns the counts.
+    """
     print("\nPreparing documents...")
-    documents = prepare_documents()
+    if documents is None:
+        documents = prepare_documents()
     print(f"Total documents: {len(documents)}")
     
-    print("\nGenerating embeddings...")
-    points = []
+    # Diff against what is already stored
+    wanted = {}
+    for doc in documents:
+        key = document_key(doc)
+        wanted[point_id(key, content_hash(doc))] = (key, doc)
+    stored = stored_point_ids()
+    to_add = [pid for pid in wanted if pid not in stored]
+    to_delete = stored - set(wanted)
+    summary = {
+        "unchanged": len(wanted) - len(to_add),
+        "added": len(to_add),
+        "deleted": len(to_delete),
+    }
+    print(f"  {summary['added']} new/changed, {summary['unchanged']} unchanged, "
+          f"{summary['deleted']} stale points to delete")
     
-    for idx, doc in enumerate(documents):
-        # Combine title and content for embedding
-        text = f"{doc['title']}. {doc['content']}"
+    if to_add:
+        print("\nGenerating embeddings...")
+        new_docs = [wanted[pid][1] for pid in to_add]
+        embeddings = embed_texts([document_text(doc) for doc in new_docs],
+                                 batch_size=batch_size, processes=processes)
+        points = build_points(new_docs, embeddings)
         
-        # Generate embedding
-        embedding = embedding_model.encode(text).tolist()
-        
-        # Create point for Qdrant
-        point = PointStruct(
-            id=str(uuid.uuid4()),
-            vector=embedding,
-            payload={
-                "category": doc["category"],
-                "title": doc["title"],
-                "content": doc["content"],
-                "text": text
-            }
-        )
-        points.append(point)
-        
-        if (idx + 1) % 5 == 0:
-            print(f"  Processed {idx + 1}/{len(documents)} documents...")
+        print(f"\nUploading {len(points)} points to Qdrant...")
+        upsert_points(points, chunk_size=chunk_size, workers=workers)
     
-    print(f"\nUploading {len(points)} points to Qdrant...")
-    qdrant_client.upsert(
-        collection_name=COLLECTION_NAME,
-        points=points
-    )
+    # Old versions of changed documents, removed documents, and points from
+    # earlier random-id runs
+    if to_delete:
+        print(f"\nDeleting {len(to_delete)} stale points...")
+        delete_points(to_delete, chunk_size=chunk_size)
     
     print("✅ Document ingestion complete!")
     
@@ -196,6 +349,170 @@ def ingest_documents():
     print(f"\nCollection stats:")
     print(f"  Total vectors: {collection_info.points_count}")
     print(f"  Vector dimensions: {EMBEDDING_DIM}")
+    return summary
+
+# --- Streaming directory ingestion ---
+def load_checkpoint(path, root):
+    """Per-file manifest of a previous run over `root` (file hash -> point ids)"""
+    if path and os.path.exists(path):
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("root") == root:
+            return checkpoint
+        print(f"  Checkpoint {path} is for {checkpoint.get('root')}, starting fresh")
+    return {"root": root, "files": {}}
+
+def save_checkpoint(path, checkpoint):
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def ingest_directory(root, batch_size=EMBED_BATCH_SIZE, chunk_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP,
+                     workers=UPSERT_WORKERS, checkpoint_path=CHECKPOINT_PATH,
+                     max_pending_batches=MAX_PENDING_BATCHES):
+    """
+    Stream every document under `root` into Qdrant as token-bounded,
+    overlapping chunks.
+
+    Files are chunked lazily and embedded in fixed-size batches. Embedded
+    batches go through a bounded queue to the upsert workers, so the reader
+    blocks (backpressure) instead of buffering when Qdrant falls behind.
+    A file is recorded in the checkpoint only once all of its chunks are
+    stored; unchanged files are skipped, so an interrupted run resumes where
+    it stopped and nightly runs only touch changed files. After a complete
+    run, chunks of changed or deleted files are removed.
+    """
+    root = os.path.abspath(root)
+    if not QDRANT_URL:
+        workers = 1
+    checkpoint = load_checkpoint(checkpoint_path, root)
+    done = checkpoint["files"]
+    tokenizer = embedding_model.tokenizer
+
+    pending = queue.Queue(maxsize=max_pending_batches)
+    lock = threading.Lock()
+    in_progress = {}  # relative path -> manifest entry being built
+    remaining = {}    # relative path -> chunks produced but not yet stored
+    produced = set()  # files whose chunks have all been produced
+    errors = []
+    seen_files = set()
+    wanted_ids = set()
+    stats = {"files": 0, "skipped": 0, "chunks": 0, "embed_s": 0.0}
+
+    def finish_file(relative):
+        done[relative] = in_progress.pop(relative)
+        remaining.pop(relative)
+        produced.discard(relative)
+        if len(done) % CHECKPOINT_EVERY == 0:
+            save_checkpoint(checkpoint_path, checkpoint)
+
+    def upsert_worker():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            points, counts = item
+            try:
+                qdrant_client.upsert(collection_name=COLLECTION_NAME, points=points, wait=True)
+            except Exception as e:
+                errors.append(e)
+                continue
+            with lock:
+                for relative, n in counts.items():
+                    remaining[relative] -= n
+                    if remaining[relative] == 0 and relative in produced:
+                        finish_file(relative)
+
+    threads = [threading.Thread(target=upsert_worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    batch = []  # (relative path, chunk document)
+
+    def flush():
+        start = time.perf_counter()
+        docs = [doc for _, doc in batch]
+        embeddings = embedding_model.encode([document_text(doc) for doc in docs],
+                                            batch_size=batch_size, convert_to_numpy=True)
+        stats["embed_s"] += time.perf_counter() - start
+        counts = {}
+        for relative, _ in batch:
+            counts[relative] = counts.get(relative, 0) + 1
+        # Blocks while max_pending_batches are waiting for the upsert workers
+        pending.put((build_points(docs, embeddings, source_root=root), counts))
+        batch.clear()
+
+    started = time.perf_counter()
+    completed = False
+    try:
+        for path in iter_files(root):
+            if errors:
+                raise errors[0]
+            relative = os.path.relpath(path, root)
+            seen_files.add(relative)
+            signature = file_signature(path)
+            entry = done.get(relative)
+            if entry and entry["sha256"] == signature:
+                wanted_ids.update(entry["ids"])
+                stats["skipped"] += 1
+                continue
+
+            ids = []
+            with lock:
+                done.pop(relative, None)
+                in_progress[relative] = {"sha256": signature, "ids": ids}
+                remaining[relative] = 0
+            for doc in iter_file_chunks(root, path, tokenizer, chunk_tokens, overlap):
+                pid = point_id(document_key(doc), content_hash(doc))
+                ids.append(pid)
+                wanted_ids.add(pid)
+                with lock:
+                    remaining[relative] += 1
+                batch.append((relative, doc))
+                stats["chunks"] += 1
+                if len(batch) >= batch_size:
+                    flush()
+            with lock:
+                produced.add(relative)
+                if remaining[relative] == 0:
+                    finish_file(relative)
+            stats["files"] += 1
+            if stats["files"] % 50 == 0:
+                elapsed = time.perf_counter() - started
+                print(f"  {stats['files']} files, {stats['chunks']} chunks "
+                      f"({stats['chunks'] / max(elapsed, 1e-9):.0f} chunks/s)")
+        if batch:
+            flush()
+        completed = True
+    finally:
+        for _ in threads:
+            pending.put(None)
+        for thread in threads:
+            thread.join()
+        if errors:
+            completed = False
+        if completed:
+            # Forget files that no longer exist, then drop their chunks and
+            # the old chunks of changed files
+            for relative in list(done):
+                if relative not in seen_files:
+                    del done[relative]
+            stale = stored_point_ids(root) - wanted_ids
+            if stale:
+                print(f"  Deleting {len(stale)} stale chunks")
+                delete_points(stale)
+        save_checkpoint(checkpoint_path, checkpoint)
+
+    if errors:
+        raise errors[0]
+    elapsed = time.perf_counter() - started
+    print(f"✅ Directory ingestion complete: {stats['files']} files changed, {stats['skipped']} unchanged, "
+          f"{stats['chunks']} chunks in {elapsed:.1f}s "
+          f"({stats['chunks'] / max(elapsed, 1e-9):.0f} chunks/s, embedding {stats['embed_s']:.1f}s)")
+    return stats
 
 def test_query():
     """Test the RAG system with a sample query"""
@@ -209,18 +526,20 @@ def test_query():
         "What is the budget allocation for staffing?"
     ]
     
-    for query in test_queries:
+    # Generate all query embeddings in one batch
+    query_embeddings = embedding_model.encode(test_queries, convert_to_numpy=True)
+    
+    for query, query_embedding in zip(test_queries, query_embeddings):
         print(f"\nQuery: {query}")
-        
-        # Generate query embedding
-        query_embedding = embedding_model.encode(query).tolist()
+        query_embedding = query_embedding.tolist()
         
         # Search Qdrant
-        results = qdrant_client.search(
+        results = qdrant_client.query_points(
             collection_name=COLLECTION_NAME,
-            query_vector=query_embedding,
-            limit=2
-        )
+            query=query_embedding,
+            limit=2,
+            search_params=search_params()
+        ).points
         
         print("Top results:")
         for i, result in enumerate(results, 1):
@@ -229,6 +548,21 @@ def test_query():
             print(f"     Content: {result.payload['content'][:100]}...")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest healthcare documents into Qdrant")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="texts per encode batch")
+    parser.add_argument("--processes", type=int, default=ENCODE_PROCESSES, help="encoding processes (>1 = pool)")
+    parser.add_argument("--chunk-size", type=int, default=UPSERT_CHUNK_SIZE, help="points per upsert request")
+    parser.add_argument("--workers", type=int, default=UPSERT_WORKERS, help="parallel upsert requests")
+    parser.add_argument("--skip-test", action="store_true", help="don't run the sample queries")
+    parser.add_argument("--dir", help="stream documents from this directory instead of the built-in set")
+    parser.add_argument("--chunk-tokens", type=int, default=CHUNK_TOKENS, help="max tokens per chunk")
+    parser.add_argument("--overlap", type=int, default=CHUNK_OVERLAP, help="tokens shared by consecutive chunks")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="resumable manifest file ('' disables)")
+    parser.add_argument("--export-index", action="store_true",
+                        help="create the memory-mapped read index (vector_index.py) afterwards; "
+                             "an existing one is always refreshed")
+    args = parser.parse_args()
+    
     print("="*60)
     print("Healthcare RAG System - Document Ingestion")
     print("="*60)
@@ -237,10 +571,23 @@ if __name__ == "__main__":
     create_collection()
     
     # Ingest documents
-    ingest_documents()
+    if args.dir:
+        ingest_directory(args.dir, batch_size=args.batch_size, chunk_tokens=args.chunk_tokens,
+                         overlap=args.overlap, workers=args.workers, checkpoint_path=args.checkpoint)
+    else:
+        ingest_documents(batch_size=args.batch_size, processes=args.processes,
+                         chunk_size=args.chunk_size, workers=args.workers)
+    
+    # An existing read index is always refreshed, otherwise /chat would keep
+    # serving the documents of the previous ingest
+    from vector_index import export_collection, current_version
+    if args.export_index or current_version():
+        version = export_collection(qdrant_client, COLLECTION_NAME)
+        print(f"✅ Exported read index {version}")
     
     # Test queries
-    test_query()
+    if not args.skip_test:
+        test_query()
     
     print("\n✅ Setup complete! RAG system is ready.")
     print("\nNext steps:")
@@ -1,5 +1,130 @@
 import numpy as np
 
+try:
+    from scipy.signal import lfilter
+except ImportError:  # scipy is optional; fall back to a vectorized loop
+    lfilter = None
+
+
+def steady_state_gain(process_variance, measurement_variance):
+    """
+    Closed-form steady-state Kalman gain for a random-walk state.
+    The prior covariance P solves P^2 - qP - qr = 0.
+    """
+    q, r = process_variance, measurement_variance
+    prior = (q + np.sqrt(q * q + 4 * q * r)) / 2
+    return prior / (prior + r), prior
+
+
+def kalman_gain_schedule(length, process_variance=1e-5, measurement_variance=1e-1,
+                         initial_error=1.0, tol=1e-12):
+    """
+    Gain and covariance sequence for a series of `length` steps.
+
+    The covariance recursion does not depend on the measurements, so it is the
+    same for every series and only has to be computed once per batch. Once the
+    gain is within `tol` of its steady state the remaining steps use the closed
+    form value.
+
+    Returns (gains, post_errors, prior_errors, converged_at)
+    """
+    q, r = process_variance, measurement_variance
+    k_inf, prior_inf = steady_state_gain(q, r)
+
+    gains = np.full(length, k_inf)
+    prior_errors = np.full(length, prior_inf)
+    post_errors = np.full(length, (1 - k_inf) * prior_inf)
+
+    post = initial_error
+    converged_at = length
+    for t in range(length):
+        prior = post + q
+        gain = prior / (prior + r)
+        post = (1 - gain) * prior
+        gains[t], prior_errors[t], post_errors[t] = gain, prior, post
+        if abs(gain - k_inf) < tol:
+            converged_at = t + 1
+            break
+
+    return gains, post_errors, prior_errors, converged_at
+
+
+def batch_kalman_filter(series, process_variance=1e-5, measurement_variance=1e-1,
+                        initial_error=1.0, initial_estimate=None, smooth=False,
+                        return_state=False):
+    """
+    Filter many series at once.
+
+    Args:
+        series: (n_series, length) array, or a single 1-D series
+        initial_estimate: starting state per series (defaults to each first value)
+        smooth: run a Rauch-Tung-Striebel backward pass after filtering
+        return_state: also return (last_estimate, last_error) for incremental updates
+
+    Returns:
+        Cleaned array with the same shape as `series`
+    """
+    values = np.asarray(series, dtype=float)
+    single = values.ndim == 1
+    values = np.atleast_2d(values)
+    n_series, length = values.shape
+
+    if length == 0:
+        empty = values[0] if single else values
+        if return_state:
+            return empty, np.zeros(n_series), initial_error
+        return empty
+
+    if initial_estimate is None:
+        estimate = values[:, 0].copy()
+    else:
+        estimate = np.broadcast_to(np.asarray(initial_estimate, dtype=float), (n_series,)).copy()
+
+    gains, post_errors, prior_errors, converged_at = kalman_gain_schedule(
+        length, process_variance, measurement_variance, initial_error
+    )
+
+    filtered = np.empty_like(values)
+
+    # Transient: time-varying gain, vectorized across series
+    for t in range(converged_at):
+        estimate = estimate + gains[t] * (values[:, t] - estimate)
+        filtered[:, t] = estimate
+
+    # Steady state: constant gain, x_t = (1 - K) x_{t-1} + K z_t
+    if converged_at < length:
+        k = gains[-1]
+        rest = values[:, converged_at:]
+        if lfilter is not None:
+            zi = ((1 - k) * estimate)[:, None]
+            filtered[:, converged_at:], _ = lfilter([k], [1.0, -(1 - k)], rest, axis=1, zi=zi)
+        else:
+            for t in range(rest.shape[1]):
+                estimate = estimate + k * (rest[:, t] - estimate)
+                filtered[:, converged_at + t] = estimate
+
+    last_estimate = filtered[:, -1].copy()
+    last_error = float(post_errors[length - 1])
+
+    result = filtered
+    if smooth and length > 1:
+        # RTS for a random walk: x_s[t] = x_f[t] + C_t (x_s[t+1] - x_f[t]),
+        # C_t = P_post[t] / P_prior[t+1]
+        smoothed = filtered.copy()
+        coeffs = post_errors[:-1] / prior_errors[1:]
+        for t in range(length - 2, -1, -1):
+            smoothed[:, t] = filtered[:, t] + coeffs[t] * (smoothed[:, t + 1] - filtered[:, t])
+        result = smoothed
+
+    if single:
+        result = result[0]
+        last_estimate = last_estimate[0]
+
+    if return_state:
+        return result, last_estimate, last_error
+    return result
+
+
 class KalmanNet:
     def __init__(self, process_variance=1e-5, measurement_variance=1e-1):
         self.process_variance = process_variance
@@ -16,15 +141,31 @@ class KalmanNet:
         blending_factor = prior_error_estimate / (prior_error_estimate + self.measurement_variance)
         self.post_estimate = prior_estimate + blending_factor * (measurement - prior_estimate)
         self.post_error_estimate = (1 - blending_factor) * prior_error_estimate
-        
+
         return self.post_estimate
 
-    def clean_series(self, series):
-        cleaned = []
-        # Initialize with first value if available
-        if len(series) > 0:
-            self.post_estimate = series[0]
-            
-        for val in series:
-            cleaned.append(self.update(val))
-        return cleaned
+    def clean_series(self, series, smooth=False):
+        if len(series) == 0:
+            return []
+
+        # Initialize with first value
+        cleaned, self.post_estimate, self.post_error_estimate = batch_kalman_filter(
+            series,
+            process_variance=self.process_variance,
+            measurement_variance=self.measurement_variance,
+            initial_error=self.post_error_estimate,
+            smooth=smooth,
+            return_state=True
+        )
+        self.post_estimate = float(self.post_estimate)
+        return cleaned.tolist()
+
+    def clean_batch(self, series_matrix, smooth=False):
+        """Clean an (n_series, length) array in one vectorized pass"""
+        return batch_kalman_filter(
+            series_matrix,
+            process_variance=self.process_variance,
+            measurement_variance=self.measurement_variance,
+            initial_error=self.post_error_estimate,
+            smooth=smooth
+        )
@@ -0,0 +1,144 @@
+"""
+Checkpointed Kalman state per series.
+
+Instead of refiltering the whole window on every forecast request, the filter's
+posterior estimate and error covariance are stored together with the last
+observed date and a tail of raw/cleaned values. A request that only brings new
+days costs one update step per new day; a full refilter happens only when a
+stored raw value has been corrected (or the history no longer lines up).
+"""
+
+import os
+import json
+import logging
+import threading
+
+import numpy as np
+
+from kalman_filter import KalmanNet, batch_kalman_filter
+
+logger = logging.getLogger(__name__)
+
+STATE_PATH = os.path.join(os.path.dirname(__file__), "kalman_state.json")
+
+# Raw/cleaned days kept per series (must cover the longest requested window)
+KEEP_DAYS = 365
+
+
+def _day(date):
+    if isinstance(date, str):
+        return date[:10]
+    if hasattr(date, 'strftime'):
+        return date.strftime('%Y-%m-%d')
+    return str(date)[:10]
+
+
+class KalmanStateStore:
+    def __init__(self, state_path=STATE_PATH, process_variance=1e-5, measurement_variance=1e-1):
+        self.state_path = state_path
+        self.process_variance = process_variance
+        self.measurement_variance = measurement_variance
+        self._lock = threading.Lock()
+        self.series = {}
+        self.load()
+
+    def load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path) as f:
+                self.series = json.load(f)
+            logger.info(f"✅ Loaded Kalman checkpoints for {len(self.series)} series")
+        except Exception as e:
+            logger.warning(f"⚠️  Could not load Kalman checkpoints: {e}")
+
+    def save(self):
+        if not self.state_path:
+            return
+        tmp_path = f"{self.state_path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.series, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not persist Kalman checkpoints: {e}")
+
+    def _refilter(self, series_key, days, values):
+        cleaned, estimate, error = batch_kalman_filter(
+            values,
+            process_variance=self.process_variance,
+            measurement_variance=self.measurement_variance,
+            return_state=True
+        )
+        self.series[series_key] = {
+            'last_day': days[-1],
+            'estimate': float(estimate),
+            'error': float(error),
+            'days': days[-KEEP_DAYS:],
+            'raw': [float(v) for v in values[-KEEP_DAYS:]],
+            'cleaned': [float(v) for v in cleaned[-KEEP_DAYS:]],
+        }
+        return cleaned.tolist()
+
+    def _extend(self, state, days, values):
+        """Apply one filter step per new day. Returns False if history was corrected."""
+        stored = dict(zip(state['days'], state['raw']))
+        last_day = state['last_day']
+
+        overlap = [(d, v) for d, v in zip(days, values) if d <= last_day]
+        if not overlap or overlap[-1][0] != last_day:
+            return False
+        for d, v in overlap:
+            if d in stored and not np.isclose(stored[d], v):
+                return False
+
+        kalman = KalmanNet(self.process_variance, self.measurement_variance)
+        kalman.post_estimate = state['estimate']
+        kalman.post_error_estimate = state['error']
+
+        new = [(d, v) for d, v in zip(days, values) if d > last_day]
+        for d, v in new:
+            state['days'].append(d)
+            state['raw'].append(float(v))
+            state['cleaned'].append(float(kalman.update(v)))
+
+        state['last_day'] = new[-1][0] if new else last_day
+        state['estimate'] = float(kalman.post_estimate)
+        state['error'] = float(kalman.post_error_estimate)
+        for key in ('days', 'raw', 'cleaned'):
+            state[key] = state[key][-KEEP_DAYS:]
+        return True
+
+    def clean(self, dates, values, series_key='default'):
+        """
+        Cleaned values for `dates` (sorted ascending), reusing the checkpoint
+        when only new days have arrived.
+        """
+        days = [_day(d) for d in dates]
+        values = [float(v) for v in values]
+        if not days:
+            return []
+
+        with self._lock:
+            state = self.series.get(series_key)
+            previous_day = state['last_day'] if state else None
+            if state is not None and self._extend(state, days, values):
+                cleaned_by_day = dict(zip(state['days'], state['cleaned']))
+                if all(d in cleaned_by_day for d in days):
+                    if state['last_day'] != previous_day:
+                        self.save()
+                    return [cleaned_by_day[d] for d in days]
+
+            logger.info(f"🔁 Full Kalman refilter for series '{series_key}' ({len(days)} days)")
+            cleaned = self._refilter(series_key, days, values)
+            self.save()
+            return cleaned
+
+
+_store = None
+
+def get_kalman_store():
+    global _store
+    if _store is None:
+        _store = KalmanStateStore()
+    return _store
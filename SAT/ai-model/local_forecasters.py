@@ -0,0 +1,176 @@
+"""
+Vectorized statistical forecasters for local models and fallbacks.
+
+Every method takes either one series (length,) or a batch (n_series, length)
+and returns (horizon,) or (n_series, horizon) accordingly. They are pure NumPy,
+deterministic, and loop over time at most (never over series), so hundreds of
+hospital series can be forecast in a single call.
+"""
+
+import numpy as np
+
+try:
+    from scipy.signal import lfilter
+except ImportError:  # scipy is optional; fall back to a vectorized loop
+    lfilter = None
+
+
+def _as_batch(series):
+    values = np.asarray(series, dtype=float)
+    single = values.ndim == 1
+    return np.atleast_2d(values), single
+
+
+def _finish(forecast, single, non_negative=True):
+    if non_negative:
+        forecast = np.maximum(forecast, 0.0)
+    return forecast[0] if single else forecast
+
+
+def _ses_levels(values, alpha):
+    """Simple exponential smoothing level for every step: l_t = a*y_t + (1-a)*l_{t-1}"""
+    if values.shape[1] == 1:
+        return values.copy()
+    zi = ((1 - alpha) * values[:, 0])[:, None]
+    if lfilter is not None:
+        levels, _ = lfilter([alpha], [1.0, -(1 - alpha)], values[:, 1:], axis=1, zi=zi)
+    else:
+        levels = np.empty_like(values[:, 1:])
+        level = values[:, 0]
+        for t in range(values.shape[1] - 1):
+            level = alpha * values[:, t + 1] + (1 - alpha) * level
+            levels[:, t] = level
+    return np.concatenate([values[:, :1], levels], axis=1)
+
+
+def seasonal_naive(series, horizon=14, period=7):
+    """Repeat the last full season. Falls back to the mean for short series."""
+    values, single = _as_batch(series)
+    if values.shape[1] < period:
+        return mean_forecast(series, horizon)
+    last_season = values[:, -period:]
+    idx = np.arange(horizon) % period
+    return _finish(last_season[:, idx], single)
+
+
+def mean_forecast(series, horizon=14, window=None):
+    """Flat forecast at the mean of the last `window` values (all values if None)"""
+    values, single = _as_batch(series)
+    recent = values if window is None else values[:, -window:]
+    level = recent.mean(axis=1, keepdims=True)
+    return _finish(np.repeat(level, horizon, axis=1), single)
+
+
+def drift(series, horizon=14, window=None):
+    """
+    Random walk with drift: last value plus the average step over the window.
+    """
+    values, single = _as_batch(series)
+    recent = values if window is None else values[:, -window:]
+    if recent.shape[1] < 2:
+        return mean_forecast(series, horizon)
+    slope = (recent[:, -1] - recent[:, 0]) / (recent.shape[1] - 1)
+    steps = np.arange(1, horizon + 1)
+    return _finish(recent[:, -1:] + slope[:, None] * steps, single)
+
+
+def ses(series, horizon=14, alpha=0.3):
+    """Simple exponential smoothing (ETS(A,N,N) with a fixed smoothing factor)"""
+    values, single = _as_batch(series)
+    level = _ses_levels(values, alpha)[:, -1:]
+    return _finish(np.repeat(level, horizon, axis=1), single)
+
+
+def holt_winters(series, horizon=14, period=7, alpha=0.3, beta=0.05, gamma=0.1,
+                 trend=True, damping=0.98):
+    """
+    Additive Holt-Winters (ETS(A,Ad,A)) with fixed smoothing parameters.
+    Needs two full seasons; shorter series fall back to SES.
+    """
+    values, single = _as_batch(series)
+    n = values.shape[1]
+    if n < 2 * period:
+        return ses(series, horizon, alpha=alpha)
+
+    first = values[:, :period].mean(axis=1)
+    second = values[:, period:2 * period].mean(axis=1)
+    level = first
+    slope = (second - first) / period if trend else np.zeros_like(first)
+    season = values[:, :period] - first[:, None]
+
+    phi = damping if trend else 0.0
+    for t in range(period, n):
+        s = season[:, t % period]
+        prev_level = level
+        level = alpha * (values[:, t] - s) + (1 - alpha) * (prev_level + phi * slope)
+        if trend:
+            slope = beta * (level - prev_level) + (1 - beta) * phi * slope
+        season[:, t % period] = gamma * (values[:, t] - level) + (1 - gamma) * s
+
+    steps = np.arange(1, horizon + 1)
+    if trend:
+        damped_steps = np.cumsum(phi ** steps)
+    else:
+        damped_steps = np.zeros(horizon)
+    seasonal = season[:, (n + steps - 1) % period]
+    forecast = level[:, None] + slope[:, None] * damped_steps + seasonal
+    return _finish(forecast, single)
+
+
+def theta(series, horizon=14, alpha=0.3, period=None):
+    """
+    Theta method (theta=2): SES forecast plus half the linear-trend slope.
+    With `period`, the series is additively deseasonalised first.
+    """
+    values, single = _as_batch(series)
+    n = values.shape[1]
+    if n < 3:
+        return mean_forecast(series, horizon)
+
+    seasonal_future = 0.0
+    if period and n >= 2 * period:
+        phase = np.arange(n) % period
+        season = np.stack([values[:, phase == p].mean(axis=1) for p in range(period)], axis=1)
+        season = season - season.mean(axis=1, keepdims=True)
+        values = values - season[:, phase]
+        seasonal_future = season[:, (n + np.arange(horizon)) % period]
+
+    t = np.arange(n)
+    t_centered = t - t.mean()
+    slope = (values * t_centered).sum(axis=1) / (t_centered ** 2).sum()
+
+    level = _ses_levels(values, alpha)[:, -1]
+    steps = np.arange(1, horizon + 1)
+    drift_term = 0.5 * slope[:, None] * ((steps - 1) + (1 - (1 - alpha) ** n) / alpha)
+    forecast = level[:, None] + drift_term + seasonal_future
+    return _finish(forecast, single)
+
+
+FORECASTERS = {
+    'seasonal_naive': seasonal_naive,
+    'mean': mean_forecast,
+    'drift': drift,
+    'ses': ses,
+    'holt_winters': holt_winters,
+    'theta': theta,
+}
+
+
+def forecast(method, series, horizon=14, **kwargs):
+    """Dispatch by name, e.g. forecast('theta', batch, horizon=14)"""
+    if method not in FORECASTERS:
+        raise ValueError(f"Unknown local forecaster '{method}'. Choose from {list(FORECASTERS)}")
+    return FORECASTERS[method](series, horizon=horizon, **kwargs)
+
+
+def fallback_forecast(series, horizon=14, method='theta', **kwargs):
+    """
+    Deterministic fallback used when a model fails: returns a plain list for a
+    single series, or a (n_series, horizon) array for a batch. Empty input gives
+    a flat line at 0.
+    """
+    values = np.asarray(series, dtype=float)
+    if values.size == 0:
+        return [0.0] * horizon
+    result = forecast(method, values, horizon=horizon, **kwargs)
+    return result.tolist() if result.ndim == 1 else result
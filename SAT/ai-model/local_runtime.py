@@ -0,0 +1,261 @@
+"""
+In-process CPU runtime for foundation forecasters.
+
+Loads checkpoints from a local directory (same idea as download_model.py does
+for MiniLM) instead of calling router.huggingface.co, and runs batched CPU
+inference over many series. The run_* wrappers try this runtime first when a
+checkpoint is present and fall back to the remote API otherwise.
+
+Environment:
+    LOCAL_FORECASTERS        '0' disables the runtime (default: on when a checkpoint exists)
+    LOCAL_FORECASTER_DIR     checkpoint root (default: ./models)
+    LOCAL_RUNTIME_THREADS    torch intra-op threads (default: torch's choice)
+    LOCAL_RUNTIME_QUANTIZE   '1' applies int8 dynamic quantization to Linear layers
+
+Chronos is implemented directly on top of transformers (mean scaling + uniform
+bin tokenizer + T5 generate). Other models plug in through `register_adapter`.
+"""
+
+import os
+import json
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LOCAL_FORECASTER_DIR = os.getenv(
+    "LOCAL_FORECASTER_DIR", os.path.join(os.path.dirname(__file__), "models")
+)
+
+# model key -> checkpoint sub-directory (last part of the HF model id)
+MODEL_DIRS = {
+    'chronos': 'chronos-t5-base',
+    'moirai': 'moirai-1.0-R-small',
+    'lagllama': 'Lag-Llama',
+    'timesfm': 'timesfm-1.0-200m',
+}
+
+_adapters = {}
+_loaded = {}
+_lock = threading.Lock()
+_torch_configured = False
+
+
+def _enabled():
+    return os.getenv("LOCAL_FORECASTERS", "1").lower() not in ("0", "false", "no")
+
+
+def checkpoint_path(model_key):
+    return os.path.join(LOCAL_FORECASTER_DIR, MODEL_DIRS.get(model_key, model_key))
+
+
+def register_adapter(model_key, loader):
+    """
+    Register a loader for `model_key`.
+    loader(checkpoint_dir) must return an object with
+    predict(batch: np.ndarray (n_series, length), horizon: int) -> np.ndarray (n_series, horizon)
+    """
+    _adapters[model_key] = loader
+
+
+def is_available(model_key):
+    """True if the runtime is enabled, an adapter exists and its checkpoint is on disk"""
+    return (
+        _enabled()
+        and model_key in _adapters
+        and os.path.isdir(checkpoint_path(model_key))
+    )
+
+
+def _configure_torch():
+    global _torch_configured
+    if _torch_configured:
+        return
+    import torch
+    threads = os.getenv("LOCAL_RUNTIME_THREADS")
+    if threads:
+        torch.set_num_threads(int(threads))
+        try:
+            torch.set_num_interop_threads(max(1, int(threads) // 2))
+        except RuntimeError:
+            # Can only be set once, before any parallel work has started
+            pass
+    _torch_configured = True
+
+
+def _maybe_quantize(model):
+    if os.getenv("LOCAL_RUNTIME_QUANTIZE", "0") != "1":
+        return model
+    import torch
+    logger.info("🗜️  Applying int8 dynamic quantization")
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def get_model(model_key):
+    """Load (once) and return the runtime object for `model_key`"""
+    if model_key in _loaded:
+        return _loaded[model_key]
+    with _lock:
+        if model_key not in _loaded:
+            if model_key not in _adapters:
+                raise ValueError(f"No local runtime adapter for '{model_key}'")
+            _configure_torch()
+            path = checkpoint_path(model_key)
+            logger.info(f"📦 Loading local {model_key} checkpoint from {path}")
+            _loaded[model_key] = _adapters[model_key](path)
+    return _loaded[model_key]
+
+
+def forecast(model_key, historical_data, horizon=14):
+    """
+    Forecast one series (returns a list) or an (n_series, length) batch
+    (returns an (n_series, horizon) array).
+    """
+    values = np.asarray(historical_data, dtype=float)
+    single = values.ndim == 1
+    batch = np.atleast_2d(values)
+    result = get_model(model_key).predict(batch, horizon)
+    return result[0].tolist() if single else result
+
+
+# --- Chronos ---
+class ChronosRuntime:
+    """
+    Chronos T5 on CPU: mean-scale the context, quantize into uniform bins,
+    generate `horizon` tokens and map them back to bin centers.
+    """
+
+    def __init__(self, checkpoint_dir, num_samples=None):
+        import torch
+        from transformers import AutoConfig, T5ForConditionalGeneration
+
+        config = AutoConfig.from_pretrained(checkpoint_dir)
+        chronos_config = getattr(config, 'chronos_config', None)
+        if chronos_config is None:
+            with open(os.path.join(checkpoint_dir, 'config.json')) as f:
+                chronos_config = json.load(f)['chronos_config']
+        self.cfg = chronos_config
+
+        kwargs = chronos_config.get('tokenizer_kwargs', {})
+        low, high = kwargs.get('low_limit', -15.0), kwargs.get('high_limit', 15.0)
+        n_tokens = chronos_config['n_tokens']
+        self.n_special = chronos_config['n_special_tokens']
+        self.pad_id = chronos_config['pad_token_id']
+        self.eos_id = chronos_config['eos_token_id']
+        self.use_eos = chronos_config.get('use_eos_token', True)
+        self.context_length = chronos_config.get('context_length', 512)
+        self.num_samples = num_samples or 1
+        self.temperature = chronos_config.get('temperature', 1.0)
+        self.top_k = chronos_config.get('top_k', 50)
+        self.top_p = chronos_config.get('top_p', 1.0)
+        self.n_tokens = n_tokens
+
+        self.centers = torch.linspace(low, high, n_tokens - self.n_special - 1)
+        self.boundaries = torch.concat((
+            torch.tensor([-1e20]),
+            (self.centers[1:] + self.centers[:-1]) / 2,
+            torch.tensor([1e20]),
+        ))
+
+        model = T5ForConditionalGeneration.from_pretrained(checkpoint_dir)
+        model.eval()
+        self.model = _maybe_quantize(model)
+        self.torch = torch
+
+    def _tokenize(self, batch):
+        torch = self.torch
+        context = torch.as_tensor(batch[:, -self.context_length:], dtype=torch.float32)
+        mask = ~torch.isnan(context)
+        safe = torch.where(mask, context, torch.zeros_like(context))
+        scale = safe.abs().sum(dim=-1) / mask.sum(dim=-1).clamp(min=1)
+        scale = torch.where(scale > 0, scale, torch.ones_like(scale))
+        scaled = safe / scale[:, None]
+
+        token_ids = torch.bucketize(scaled, self.boundaries, right=True) + self.n_special
+        token_ids = token_ids.clamp(0, self.n_tokens - 1)
+        token_ids[~mask] = self.pad_id
+
+        if self.use_eos:
+            eos = torch.full((token_ids.shape[0], 1), self.eos_id, dtype=token_ids.dtype)
+            token_ids = torch.concat((token_ids, eos), dim=1)
+            mask = torch.concat((mask, torch.ones_like(mask[:, :1])), dim=1)
+
+        return token_ids, mask, scale
+
+    def predict(self, batch, horizon):
+        torch = self.torch
+        from transformers import GenerationConfig
+
+        token_ids, mask, scale = self._tokenize(batch)
+        sample = self.num_samples > 1
+        generation_config = GenerationConfig(
+            min_new_tokens=horizon,
+            max_new_tokens=horizon,
+            do_sample=sample,
+            num_return_sequences=self.num_samples,
+            eos_token_id=self.eos_id,
+            pad_token_id=self.pad_id,
+            decoder_start_token_id=self.pad_id,
+            **({'temperature': self.temperature, 'top_k': self.top_k, 'top_p': self.top_p} if sample else {})
+        )
+
+        with torch.inference_mode():
+            output = self.model.generate(
+                input_ids=token_ids,
+                attention_mask=mask.long(),
+                generation_config=generation_config,
+            )
+
+        # Drop the decoder start token, reshape to (n_series, n_samples, horizon)
+        samples = output[:, 1:horizon + 1].reshape(batch.shape[0], self.num_samples, -1)
+        indices = (samples - self.n_special - 1).clamp(0, len(self.centers) - 1)
+        values = self.centers[indices] * scale[:, None, None]
+        return values.median(dim=1).values.numpy().astype(float)
+
+
+register_adapter('chronos', ChronosRuntime)
+
+
+def create_tiny_chronos_checkpoint(path, n_tokens=64, context_length=32, seed=0):
+    """Randomly initialised, tiny Chronos-style T5 checkpoint for smoke tests"""
+    import torch
+    from transformers import T5Config, T5ForConditionalGeneration
+
+    torch.manual_seed(seed)
+    config = T5Config(
+        vocab_size=n_tokens, d_model=16, d_ff=32, d_kv=8, num_layers=1,
+        num_decoder_layers=1, num_heads=2, pad_token_id=0, eos_token_id=1,
+        decoder_start_token_id=0,
+    )
+    config.chronos_config = {
+        'tokenizer_class': 'MeanScaleUniformBins',
+        'tokenizer_kwargs': {'low_limit': -15.0, 'high_limit': 15.0},
+        'n_tokens': n_tokens,
+        'n_special_tokens': 2,
+        'pad_token_id': 0,
+        'eos_token_id': 1,
+        'use_eos_token': True,
+        'model_type': 'seq2seq',
+        'context_length': context_length,
+        'prediction_length': 14,
+    }
+    T5ForConditionalGeneration(config).save_pretrained(path)
+    return path
+
+
+if __name__ == '__main__':
+    # Smoke test against a tiny random checkpoint
+    import tempfile
+    import time
+    logging.basicConfig(level=logging.INFO)
+
+    LOCAL_FORECASTER_DIR = tempfile.mkdtemp()
+    create_tiny_chronos_checkpoint(checkpoint_path('chronos'))
+    batch = 100 + 10 * np.random.default_rng(0).standard_normal((256, 90))
+
+    start = time.perf_counter()
+    result = forecast('chronos', batch, horizon=14)
+    print(f"Chronos local: {result.shape} in {time.perf_counter() - start:.2f}s")
+    print(f"Single series: {forecast('chronos', batch[0], horizon=7)}")
@@ -1,59 +1,42 @@
 import numpy as np
 from huggingface_hub import InferenceClient
 import json
+from local_forecasters import fallback_forecast
+from model_health import call_remote_model
 
-def run_chronos(historical_data, token=None, horizon=14):
+MODEL_ID = "amazon/chronos-t5-base"
+
+def _payload(historical_data, horizon):
+    # Chronos expects JSON input with time series
+    return {
+        "inputs": historical_data if isinstance(historical_data, list) else historical_data.tolist(),
+        "parameters": {"prediction_length": horizon}
+    }
+
+def _parse(result, horizon):
+    if isinstance(result, list):
+        return result[:horizon]
+    if isinstance(result, dict) and 'forecast' in result:
+        return result['forecast'][:horizon]
+    return None
+
+def run_chronos(historical_data, token=None, horizon=14, cache_only=False):
     """Run Chronos time series forecasting via HuggingFace Inference API
     
     Args:
         historical_data: List or array of historical values
         token: HuggingFace API token
         horizon: Number of days to forecast
+        cache_only: Raise CacheMissError instead of calling the remote API
         
     Returns:
         List of forecasted values
     """
-    try:
-        # Construct API URL
-        api_url = f"https://router.huggingface.co/hf-inference/models/amazon/chronos-t5-base"
-        headers = {"Authorization": f"Bearer {token}"} if token else {}
-        
-        # Chronos expects JSON input with time series
-        payload = {
-            "inputs": historical_data if isinstance(historical_data, list) else historical_data.tolist(),
-            "parameters": {
-                "prediction_length": horizon
-            }
-        }
-        
-        # Call the model via requests
-        import requests
-        response = requests.post(api_url, headers=headers, json=payload)
-        
-        # Check for errors
-        if response.status_code != 200:
-            print(f"Chronos API Error {response.status_code}: {response.text}")
-            raise Exception(f"API returned {response.status_code}")
-            
-        result = response.json()
-        
-        # Extract forecast from result
-        if isinstance(result, list):
-            forecast = result[:horizon]
-        elif isinstance(result, dict) and 'forecast' in result:
-            forecast = result['forecast'][:horizon]
-        else:
-            # Fallback: use historical mean + noise
-            mean_val = np.mean(historical_data)
-            forecast = [mean_val + np.random.normal(0, mean_val * 0.1) for _ in range(horizon)]
-            
-        return forecast
-        
-    except Exception as e:
-        print(f"Chronos API error: {e}")
-        # Fallback: simple moving average forecast
-        mean_val = np.mean(historical_data[-7:])  # Use last week
-        return [mean_val + np.random.normal(0, mean_val * 0.05) for _ in range(horizon)]
+    return call_remote_model(
+        MODEL_ID, 'Chronos', historical_data, horizon, _payload, _parse,
+        # Fallback: Theta method (SES + half the linear trend)
+        fallback=lambda: fallback_forecast(historical_data, horizon, method='theta'),
+        token=token, cache_only=cache_only, runtime='chronos')
 
 if __name__ == '__main__':
     # Test
@@ -0,0 +1,275 @@
+"""
+Health tracking and circuit breaking for remote forecasters.
+
+Every call a run_* wrapper makes to router.huggingface.co is recorded with its
+outcome and latency. After repeated failures the model's circuit opens and the
+wrapper raises CircuitOpenError instead of calling out, so an outage costs
+nothing per request. Once the cooldown has elapsed a single half-open probe is
+let through: success closes the circuit, failure re-opens it with a longer
+cooldown.
+
+call_remote_model() is the shared path of those wrappers: local runtime,
+response cache, warm-up wait, circuit check, the HTTP call and its bookkeeping.
+Each wrapper only builds its request and parses the response.
+
+Environment:
+    CIRCUIT_FAILURES        consecutive failures that open the circuit (default 3)
+    CIRCUIT_COOLDOWN        initial cooldown in seconds (default 60)
+    CIRCUIT_MAX_COOLDOWN    cooldown cap after repeated failed probes (default 600)
+    REMOTE_MODEL_TIMEOUT    per-request timeout for remote calls (default 30)
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+import local_runtime
+from response_cache import get_response_cache, CacheMissError
+from model_warmup import get_warmup, router_url, LOADING, ModelLoadingError
+
+logger = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURES", "3"))
+COOLDOWN_SECONDS = float(os.getenv("CIRCUIT_COOLDOWN", "60"))
+MAX_COOLDOWN_SECONDS = float(os.getenv("CIRCUIT_MAX_COOLDOWN", "600"))
+REQUEST_TIMEOUT = float(os.getenv("REMOTE_MODEL_TIMEOUT", "30"))
+
+# Rolling window for error rate / latency, and the error rate that also opens
+# the circuit once the window holds at least MIN_CALLS outcomes
+WINDOW = 20
+MIN_CALLS = 5
+ERROR_RATE_THRESHOLD = 0.5
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a remote model whose circuit is open"""
+
+    def __init__(self, model_id, retry_in):
+        super().__init__(f"{model_id} circuit open, retry in {retry_in:.0f}s")
+        self.model_id = model_id
+        self.retry_in = retry_in
+
+
+class _Circuit:
+    def __init__(self):
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=WINDOW)  # (ok, latency)
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.cooldown = COOLDOWN_SECONDS
+        self.probe_started = None
+        self.last_error = None
+
+
+class ModelHealth:
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN_SECONDS,
+                 max_cooldown=MAX_COOLDOWN_SECONDS, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, model_id):
+        circuit = self._circuits.get(model_id)
+        if circuit is None:
+            circuit = self._circuits[model_id] = _Circuit()
+            circuit.cooldown = self.cooldown
+        return circuit
+
+    def allow(self, model_id):
+        """
+        True if a call to `model_id` may go out now. In the half-open state only
+        one probe is admitted at a time; a probe that never reports back is
+        given up on after one cooldown.
+        """
+        now = self.clock()
+        with self._lock:
+            circuit = self._circuit(model_id)
+            if circuit.state == CLOSED:
+                return True
+            if circuit.state == OPEN:
+                if now - circuit.opened_at < circuit.cooldown:
+                    return False
+                circuit.state = HALF_OPEN
+                circuit.probe_started = None
+            if circuit.probe_started is not None and now - circuit.probe_started < circuit.cooldown:
+                return False
+            circuit.probe_started = now
+            logger.info(f"🩺 {model_id}: half-open probe")
+            return True
+
+    def check(self, model_id):
+        """Raise CircuitOpenError unless a call to `model_id` is allowed"""
+        if not self.allow(model_id):
+            raise CircuitOpenError(model_id, self.retry_in(model_id))
+
+    def retry_in(self, model_id):
+        with self._lock:
+            circuit = self._circuit(model_id)
+            if circuit.state == CLOSED:
+                return 0.0
+            return max(0.0, circuit.opened_at + circuit.cooldown - self.clock())
+
+    def record_success(self, model_id, latency):
+        with self._lock:
+            circuit = self._circuit(model_id)
+            if circuit.state != CLOSED:
+                # Recovered: failures from the outage should not trip it again
+                circuit.outcomes.clear()
+                logger.info(f"✅ {model_id}: circuit closed")
+            circuit.outcomes.append((True, latency))
+            circuit.consecutive_failures = 0
+            circuit.state = CLOSED
+            circuit.cooldown = self.cooldown
+            circuit.probe_started = None
+
+    def release(self, model_id):
+        """
+        A call that ended without saying anything about the endpoint's health
+        (e.g. the model was still loading). Frees a half-open probe slot
+        without counting a success or a failure.
+        """
+        with self._lock:
+            self._circuit(model_id).probe_started = None
+
+    def record_failure(self, model_id, latency, error=None):
+        now = self.clock()
+        with self._lock:
+            circuit = self._circuit(model_id)
+            circuit.outcomes.append((False, latency))
+            circuit.consecutive_failures += 1
+            circuit.last_error = str(error) if error is not None else None
+
+            if circuit.state == HALF_OPEN:
+                # Failed probe: back off further
+                circuit.cooldown = min(circuit.cooldown * 2, self.max_cooldown)
+                self._open(model_id, circuit, now)
+            elif circuit.state == CLOSED and (
+                circuit.consecutive_failures >= self.failure_threshold
+                or (len(circuit.outcomes) >= MIN_CALLS
+                    and self._error_rate(circuit) >= ERROR_RATE_THRESHOLD)
+            ):
+                self._open(model_id, circuit, now)
+
+    def _open(self, model_id, circuit, now):
+        circuit.state = OPEN
+        circuit.opened_at = now
+        circuit.probe_started = None
+        logger.warning(f"🔌 {model_id}: circuit open for {circuit.cooldown:.0f}s ({circuit.last_error})")
+
+    @staticmethod
+    def _error_rate(circuit):
+        if not circuit.outcomes:
+            return 0.0
+        return sum(1 for ok, _ in circuit.outcomes if not ok) / len(circuit.outcomes)
+
+    def status(self, model_id=None):
+        """Per-model state, rolling error rate and latency"""
+        with self._lock:
+            ids = [model_id] if model_id else list(self._circuits)
+            report = {}
+            for mid in ids:
+                circuit = self._circuit(mid)
+                latencies = sorted(lat for _, lat in circuit.outcomes)
+                report[mid] = {
+                    "state": circuit.state,
+                    "error_rate": round(self._error_rate(circuit), 3),
+                    "calls": len(circuit.outcomes),
+                    "consecutive_failures": circuit.consecutive_failures,
+                    "latency_p50": round(latencies[len(latencies) // 2], 3) if latencies else None,
+                    "latency_max": round(latencies[-1], 3) if latencies else None,
+                    "last_error": circuit.last_error,
+                }
+            return report
+
+
+_health = None
+
+def get_model_health():
+    global _health
+    if _health is None:
+        _health = ModelHealth()
+    return _health
+
+
+def call_remote_model(model_id, name, historical_data, horizon, build_payload, parse, fallback,
+                      token=None, cache_only=False, runtime=None):
+    """
+    Forecast `historical_data` with a remote model, in order of cost: the
+    in-process `runtime` when its checkpoint is available, the response cache,
+    then the HF router.
+
+    build_payload(historical_data, horizon) -> JSON request body
+    parse(result, horizon) -> forecast, or None for an unexpected response
+    fallback() -> forecast returned when the call fails
+
+    Raises CacheMissError when `cache_only` and nothing is cached,
+    ModelLoadingError while the model is still cold, and CircuitOpenError
+    while its endpoint is known to be down.
+    """
+    if runtime and local_runtime.is_available(runtime):
+        try:
+            return local_runtime.forecast(runtime, historical_data, horizon=horizon)
+        except Exception as e:
+            print(f"{name} local runtime error: {e}, using remote API")
+
+    # Same input since the last data update: skip the network entirely
+    cache = get_response_cache()
+    cached = cache.get(model_id, horizon, historical_data)
+    if cached is not None:
+        return cached
+    if cache_only:
+        raise CacheMissError(model_id)
+
+    # Still cold after WARMUP_MAX_WAIT: skip it rather than hold up the request
+    warmup = get_warmup()
+    if not warmup.wait_until_ready(model_id):
+        raise ModelLoadingError(model_id)
+    # Endpoint known to be down: fail fast instead of waiting on the network
+    health = get_model_health()
+    health.check(model_id)
+    start = time.perf_counter()
+
+    try:
+        import requests
+        api_url = router_url(model_id)
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        payload = build_payload(historical_data, horizon)
+
+        response = requests.post(api_url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
+        if warmup.observe(model_id, response) == LOADING:
+            # Cold start answered 503: one retry once it should have loaded
+            if not warmup.wait_until_ready(model_id):
+                raise ModelLoadingError(model_id)
+            response = requests.post(api_url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
+            if warmup.observe(model_id, response) == LOADING:
+                raise ModelLoadingError(model_id)
+
+        if response.status_code != 200:
+            print(f"{name} API Error {response.status_code}: {response.text}")
+            raise Exception(f"API returned {response.status_code}")
+
+        forecast = parse(response.json(), horizon)
+        if forecast is None:
+            raise ValueError("unexpected response format")
+        health.record_success(model_id, time.perf_counter() - start)
+
+    except ModelLoadingError:
+        # A cold start is not an outage: keep it out of the circuit breaker
+        health.release(model_id)
+        raise
+    except Exception as e:
+        health.record_failure(model_id, time.perf_counter() - start, e)
+        print(f"{name} API error: {e}")
+        return fallback()
+
+    cache.put(model_id, horizon, historical_data, forecast)
+    return forecast
@@ -1,51 +1,37 @@
 import numpy as np
 from huggingface_hub import InferenceClient
+from local_forecasters import fallback_forecast
+from model_health import call_remote_model
 
-def run_lagllama(historical_data, token=None, horizon=14):
+MODEL_ID = "time-series-foundation-models/Lag-Llama"
+
+def _payload(historical_data, horizon):
+    return {
+        "inputs": historical_data if isinstance(historical_data, list) else historical_data.tolist(),
+        "parameters": {"prediction_length": horizon}
+    }
+
+def _parse(result, horizon):
+    if isinstance(result, list):
+        return result[:horizon]
+    if isinstance(result, dict) and 'predictions' in result:
+        return result['predictions'][:horizon]
+    return None
+
+def run_lagllama(historical_data, token=None, horizon=14, cache_only=False):
     """Run Lag-Llama probabilistic forecasting
     
     Args:
         historical_data: List or array of historical values
         token: HuggingFace API token
         horizon: Number of days to forecast
+        cache_only: Raise CacheMissError instead of calling the remote API
         
     Returns:
         List of forecasted values (median prediction)
     """
-    try:
-        # Construct API URL
-        api_url = "https://router.huggingface.co/hf-inference/models/time-series-foundation-models/Lag-Llama"
-        headers = {"Authorization": f"Bearer {token}"} if token else {}
-        
-        payload = {
-            "inputs": historical_data if isinstance(historical_data, list) else historical_data.tolist(),
-            "parameters": {"prediction_length": horizon}
-        }
-        
-        import requests
-        response = requests.post(api_url, headers=headers, json=payload)
-        
-        if response.status_code != 200:
-            print(f"Lag-Llama API Error {response.status_code}: {response.text}")
-            raise Exception(f"API returned {response.status_code}")
-            
-        result = response.json()
-        
-        if isinstance(result, list):
-            forecast = result[:horizon]
-        elif isinstance(result, dict) and 'predictions' in result:
-            forecast = result['predictions'][:horizon]
-        else:
-            # Fallback
-            mean_val = np.mean(historical_data)
-            forecast = [mean_val + np.random.normal(0, mean_val * 0.08) for _ in range(horizon)]
-            
-        return forecast
-        
-    except Exception as e:
-        print(f"Lag-Llama API error: {e}")
-        # Fallback: trend-based forecast
-        recent = historical_data[-14:] if len(historical_data) >= 14 else historical_data
-        trend = (recent[-1] - recent[0]) / len(recent) if len(recent) > 1 else 0
-        base = recent[-1] if len(recent) > 0 else 100
-        return [base + trend * (i + 1) + np.random.normal(0, 2) for i in range(horizon)]
+    return call_remote_model(
+        MODEL_ID, 'Lag-Llama', historical_data, horizon, _payload, _parse,
+        # Fallback: trend-based forecast over the last two weeks
+        fallback=lambda: fallback_forecast(historical_data, horizon, method='drift', window=14),
+        token=token, cache_only=cache_only, runtime='lagllama')
@@ -1,51 +1,37 @@
 import numpy as np
+from local_forecasters import fallback_forecast
+from seasonal_decompose import deseasonalize, seasonal_forecast
 
-def run_patchtst(historical_data, horizon=14):
+def run_patchtst(historical_data, horizon=14, decomposition=None):
     """Run PatchTST trend correction
     
     NOTE: This uses a simple statistical model as a placeholder.
     For production, train actual PatchTST using NeuralForecast.
     
     Args:
-        historical_data: List or array of historical values
+        historical_data: List or array of historical values, or an
+            (n_series, length) array to forecast many series at once
         horizon: Number of days to forecast
+        decomposition: Optional output of seasonal_decompose.get_decomposition
+            for the series that historical_data is the tail of
         
     Returns:
-        List of forecasted values
+        List of forecasted values ((n_series, horizon) array for a batch)
     """
     try:
-        # Convert to numpy
-        if not isinstance(historical_data, np.ndarray):
-            historical_data = np.array(historical_data)
+        if decomposition is not None:
+            # Linear drift on the deseasonalized series + shared seasonal profile
+            adjusted = deseasonalize(historical_data, decomposition)
+            forecast = np.asarray(fallback_forecast(adjusted, horizon, method='drift', window=30))
+            forecast = np.maximum(forecast + seasonal_forecast(decomposition, horizon), 0)
+            return forecast.tolist() if forecast.ndim == 1 else forecast
         
-        # Simple trend + seasonal decomposition
-        # Trend: linear regression on last 30 days
-        recent = historical_data[-30:] if len(historical_data) >= 30 else historical_data
-        
-        if len(recent) >= 2:
-            x = np.arange(len(recent))
-            # Simple linear fit
-            slope = (recent[-1] - recent[0]) / len(recent)
-            intercept = recent[-1]
-            
-            # Project forward
-            forecast = []
-            for i in range(horizon):
-                trend_val = intercept + slope * (i + 1)
-                # Add small noise
-                val = trend_val + np.random.normal(0, np.std(recent) * 0.1)
-                forecast.append(max(0, val))  # Ensure non-negative
-        else:
-            # Fallback
-            mean_val = np.mean(historical_data)
-            forecast = [mean_val for _ in range(horizon)]
-            
-        return forecast
+        # Linear drift over the last 30 days (deterministic, batch-capable)
+        return fallback_forecast(historical_data, horizon, method='drift', window=30)
         
     except Exception as e:
         print(f"PatchTST error: {e}")
-        mean_val = np.mean(historical_data)
-        return [mean_val for _ in range(horizon)]
+        return fallback_forecast(historical_data, horizon, method='mean')
 
 if __name__ == '__main__':
     # Test
@@ -0,0 +1,192 @@
+"""
+Versioned model bundles with atomic promotion.
+
+Layout:
+    model_registry/
+        CURRENT                      # {"current": "<version>", "previous": "<version>"}
+        versions/<version>/bundle.joblib
+        versions/<version>/manifest.json
+
+A bundle holds every target's estimators, the feature list and training
+metadata in one file. It is written under a temporary directory, renamed into
+place, and only then made live by atomically replacing the CURRENT pointer, so
+readers always see either the old or the new version in full.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+from datetime import datetime, timezone
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+MODEL_REGISTRY_DIR = os.path.join(os.path.dirname(__file__), "model_registry")
+VERSIONS_DIR = os.path.join(MODEL_REGISTRY_DIR, "versions")
+POINTER_PATH = os.path.join(MODEL_REGISTRY_DIR, "CURRENT")
+BUNDLE_FILENAME = "bundle.joblib"
+MANIFEST_FILENAME = "manifest.json"
+
+# Versions kept on disk (current + previous at minimum, for rollback)
+KEEP_VERSIONS = 3
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_pointer():
+    """Return {'current': ..., 'previous': ...} or None if nothing is published"""
+    if not os.path.exists(POINTER_PATH):
+        return None
+    try:
+        with open(POINTER_PATH) as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"⚠️  Could not read model pointer {POINTER_PATH}: {e}")
+        return None
+
+
+def _write_pointer(current, previous):
+    tmp_path = f"{POINTER_PATH}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"current": current, "previous": previous}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, POINTER_PATH)
+    _fsync_dir(MODEL_REGISTRY_DIR)
+
+
+def current_version():
+    pointer = read_pointer()
+    return pointer.get('current') if pointer else None
+
+
+def list_versions():
+    if not os.path.isdir(VERSIONS_DIR):
+        return []
+    return sorted(
+        v for v in os.listdir(VERSIONS_DIR)
+        if not v.startswith('.') and os.path.isdir(os.path.join(VERSIONS_DIR, v))
+    )
+
+
+def publish_bundle(models, features, metadata=None):
+    """
+    Write a new bundle and promote it to CURRENT.
+
+    Args:
+        models: dict like {'admissions_rf': estimator, 'admissions_gb': estimator, ...}
+        features: ordered list of feature names the estimators expect
+        metadata: extra JSON-serialisable training info (metrics, data fingerprint, ...)
+
+    Returns:
+        The new version string.
+    """
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+
+    tmp_dir = os.path.join(VERSIONS_DIR, f".tmp-{version}")
+    final_dir = os.path.join(VERSIONS_DIR, version)
+    os.makedirs(tmp_dir)
+
+    try:
+        bundle = {
+            "version": version,
+            "models": models,
+            "features": list(features),
+            "metadata": metadata or {},
+        }
+        bundle_path = os.path.join(tmp_dir, BUNDLE_FILENAME)
+        joblib.dump(bundle, bundle_path)
+        with open(bundle_path, 'rb') as f:
+            os.fsync(f.fileno())
+
+        manifest = {
+            "version": version,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "targets": sorted(models.keys()),
+            "features": list(features),
+            "metadata": metadata or {},
+            "sha256": _sha256(bundle_path),
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_FILENAME), 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.rename(tmp_dir, final_dir)
+        _fsync_dir(VERSIONS_DIR)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    previous = current_version()
+    _write_pointer(version, previous)
+    logger.info(f"✅ Published model bundle {version} (previous: {previous})")
+
+    _prune_versions(keep={version, previous})
+    return version
+
+
+def _prune_versions(keep):
+    versions = list_versions()
+    stale = [v for v in versions[:-KEEP_VERSIONS] if v not in keep]
+    for version in stale:
+        shutil.rmtree(os.path.join(VERSIONS_DIR, version), ignore_errors=True)
+        logger.info(f"🧹 Removed old model bundle {version}")
+
+
+def load_bundle(version):
+    """Load and checksum-verify a bundle. Raises if it is missing or corrupt."""
+    version_dir = os.path.join(VERSIONS_DIR, version)
+    bundle_path = os.path.join(version_dir, BUNDLE_FILENAME)
+
+    with open(os.path.join(version_dir, MANIFEST_FILENAME)) as f:
+        manifest = json.load(f)
+
+    checksum = _sha256(bundle_path)
+    if checksum != manifest['sha256']:
+        raise ValueError(f"Checksum mismatch for model bundle {version}")
+
+    return joblib.load(bundle_path)
+
+
+def promote(version):
+    """Point CURRENT at an already published version"""
+    if version not in list_versions():
+        raise ValueError(f"Unknown model version: {version}")
+    previous = current_version()
+    if version == previous:
+        return version
+    _write_pointer(version, previous)
+    logger.info(f"🔀 Promoted model bundle {version} (previous: {previous})")
+    return version
+
+
+def rollback():
+    """Swap CURRENT back to the previous version"""
+    pointer = read_pointer()
+    if not pointer or not pointer.get('previous'):
+        raise ValueError("No previous model version to roll back to")
+    return promote(pointer['previous'])
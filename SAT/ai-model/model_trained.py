@@ -3,54 +3,79 @@ import pandas as pd
 import numpy as np
 import os
 from datetime import datetime, timedelta
+from feature_store import build_inference_row
 
-MODEL_PATH_RF_ADMISSIONS = os.path.join(os.path.dirname(__file__), "trained_model_rf_admissions.joblib")
-MODEL_PATH_GB_ADMISSIONS = os.path.join(os.path.dirname(__file__), "trained_model_gb_admissions.joblib")
-
-MODEL_PATH_RF_ICU = os.path.join(os.path.dirname(__file__), "trained_model_rf_icu.joblib")
-MODEL_PATH_GB_ICU = os.path.join(os.path.dirname(__file__), "trained_model_gb_icu.joblib")
-
-MODEL_PATH_RF_OXYGEN = os.path.join(os.path.dirname(__file__), "trained_model_rf_oxygen.joblib")
-MODEL_PATH_GB_OXYGEN = os.path.join(os.path.dirname(__file__), "trained_model_gb_oxygen.joblib")
+import model_registry
 
 FEATURES_PATH = os.path.join(os.path.dirname(__file__), "model_features.joblib")
 
 _models = {}
 _features = None
+_version = None
 
 import logging
 logger = logging.getLogger(__name__)
 
-def load_models():
-    global _models, _features
+def _load_legacy_models():
+    """Load the pre-registry per-target joblib files from the working directory"""
+    models = {}
+    features = None
     targets = ['admissions', 'icu', 'oxygen']
     
+    if os.path.exists(FEATURES_PATH):
+        features = joblib.load(FEATURES_PATH)
+    
+    for target in targets:
+        rf_path = os.path.join(os.path.dirname(__file__), f"trained_model_rf_{target}.joblib")
+        gb_path = os.path.join(os.path.dirname(__file__), f"trained_model_gb_{target}.joblib")
+        
+        if os.path.exists(rf_path) and os.path.exists(gb_path):
+            models[f'{target}_rf'] = joblib.load(rf_path)
+            models[f'{target}_gb'] = joblib.load(gb_path)
+            logger.info(f"✅ Loaded legacy models for {target}")
+    
+    return models, features
+
+def load_models():
+    """
+    Make sure the CURRENT model bundle is the one in memory.
+    
+    Only the small pointer file is read on each call; a new bundle is loaded
+    fully before the globals are swapped, so in-flight predictions keep using
+    the old version and a corrupt bundle never replaces a good one.
+    """
+    global _models, _features, _version
+    
     try:
-        if os.path.exists(FEATURES_PATH):
-            _features = joblib.load(FEATURES_PATH)
+        version = model_registry.current_version()
         
-        for target in targets:
-            rf_path = os.path.join(os.path.dirname(__file__), f"trained_model_rf_{target}.joblib")
-            gb_path = os.path.join(os.path.dirname(__file__), f"trained_model_gb_{target}.joblib")
-            
-            logger.info(f"🔍 Checking for {target} models at: {rf_path}")
-            
-            if os.path.exists(rf_path) and os.path.exists(gb_path):
-                _models[f'{target}_rf'] = joblib.load(rf_path)
-                _models[f'{target}_gb'] = joblib.load(gb_path)
-                logger.info(f"✅ Loaded models for {target}")
-            else:
-                logger.warning(f"⚠️  Models for {target} not found. Exists RF: {os.path.exists(rf_path)}, GB: {os.path.exists(gb_path)}")
+        if version is None:
+            if not _models:
+                _models, _features = _load_legacy_models()
+            return
+        
+        if version == _version:
+            return
+        
+        logger.info(f"🔍 Loading model bundle {version}")
+        bundle = model_registry.load_bundle(version)
+        _models, _features, _version = bundle['models'], bundle['features'], version
+        logger.info(f"✅ Switched to model bundle {version} ({len(_models)} estimators)")
                 
     except Exception as e:
         logger.error(f"❌ Error loading trained models: {e}")
 
-def predict_single_target(target, input_df):
-    if f'{target}_rf' not in _models or f'{target}_gb' not in _models:
+def get_model_version():
+    """Version of the bundle currently serving, or None for legacy/no models"""
+    return _version
+
+def predict_single_target(target, input_df, models=None):
+    models = _models if models is None else models
+    if f'{target}_rf' not in models or f'{target}_gb' not in models:
         return 0
     
-    pred_rf = _models[f'{target}_rf'].predict(input_df)[0]
-    pred_gb = _models[f'{target}_gb'].predict(input_df)[0]
+    pred_rf = models[f'{target}_rf'].predict(input_df)[0]
+    pred_gb = models[f'{target}_gb'].predict(input_df)[0]
     return (pred_rf + pred_gb) / 2
 
 def run_trained_model(historical_data, horizon=14):
@@ -59,8 +84,10 @@ def run_trained_model(historical_data, horizon=14):
     Returns a dictionary of forecasts.
     """
     load_models()
+    # Pin one version for the whole recursive forecast
+    models, features = _models, _features
     
-    if not _models:
+    if not models:
         # Fallback
         mean_val = np.mean(historical_data)
         return {
@@ -85,40 +112,22 @@ def run_trained_model(historical_data, horizon=14):
         for i in range(horizon):
             future_date = start_date + timedelta(days=i+1)
             
-            # Construct features
-            row = {}
-            row['day_of_week'] = future_date.weekday()
-            row['month'] = future_date.month
-            
-            # Calculate lags based on current_sequence (admissions)
-            lags = [1, 7, 14, 30]
-            for lag in lags:
-                if len(current_sequence) >= lag:
-                    row[f'lag_{lag}'] = current_sequence[-lag]
-                else:
-                    row[f'lag_{lag}'] = current_sequence[0] if current_sequence else 0
-            
-            # Calculate rolling means
-            windows = [7, 30]
-            for window in windows:
-                if len(current_sequence) >= window:
-                    row[f'rolling_mean_{window}'] = np.mean(current_sequence[-window:])
-                else:
-                    row[f'rolling_mean_{window}'] = np.mean(current_sequence) if current_sequence else 0
+            # Construct features (same definitions as training)
+            row = build_inference_row(current_sequence, future_date)
             
             input_df = pd.DataFrame([row])
             
             # Add missing columns
-            if _features:
-                for col in _features:
+            if features:
+                for col in features:
                     if col not in input_df.columns:
                         input_df[col] = 0 
-                input_df = input_df[_features]
+                input_df = input_df[features]
             
             # Predict all targets
-            pred_admissions = predict_single_target('admissions', input_df)
-            pred_icu = predict_single_target('icu', input_df)
-            pred_oxygen = predict_single_target('oxygen', input_df)
+            pred_admissions = predict_single_target('admissions', input_df, models)
+            pred_icu = predict_single_target('icu', input_df, models)
+            pred_oxygen = predict_single_target('oxygen', input_df, models)
             
             # Ensure non-negative
             pred_admissions = max(0, pred_admissions)
@@ -0,0 +1,315 @@
+"""
+Keep remote forecasters warm and track their readiness.
+
+HF inference endpoints unload idle models and answer 503 "model is currently
+loading" (with an estimated_time) until they are back. A background scheduler
+in ai_service sends tiny probe forecasts on a schedule that follows observed
+traffic: frequent during hours that usually see requests (and the hour before
+them), rare otherwise. Readiness per model is shared with the run_* wrappers,
+which wait briefly for a model known to be loading instead of falling back
+straight away.
+
+Environment:
+    HF_ROUTER_URL          base URL of the inference router (point at a stub for tests)
+    WARMUP_MODELS          comma-separated model ids to keep warm (default: all four)
+    WARMUP_INTERVAL        probe interval in busy hours, seconds (default 240)
+    WARMUP_IDLE_INTERVAL   probe interval in quiet hours, seconds (default 1800)
+    WARMUP_MAX_WAIT        longest a forecast waits on a loading model, seconds (default 15)
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+ROUTER_URL = os.getenv("HF_ROUTER_URL", "https://router.huggingface.co/hf-inference/models")
+
+DEFAULT_MODELS = [
+    'amazon/chronos-t5-base',
+    'Salesforce/moirai-1.0-R-small',
+    'time-series-foundation-models/Lag-Llama',
+    'google/timesfm-1.0-200m',
+]
+
+ACTIVE_INTERVAL = float(os.getenv("WARMUP_INTERVAL", "240"))
+IDLE_INTERVAL = float(os.getenv("WARMUP_IDLE_INTERVAL", "1800"))
+MAX_WAIT = float(os.getenv("WARMUP_MAX_WAIT", "15"))
+# Poll interval while a model is loading
+LOADING_POLL = 5.0
+# Used when a 503 carries no estimated_time
+DEFAULT_LOAD_TIME = 20.0
+PROBE_TIMEOUT = 10.0
+
+# Hours without any recorded traffic are treated like this (local time)
+DEFAULT_ACTIVE_HOURS = range(7, 22)
+# Per-day decay of the hourly traffic histogram
+TRAFFIC_DECAY = 0.9
+
+UNKNOWN = 'unknown'
+LOADING = 'loading'
+READY = 'ready'
+DOWN = 'down'
+
+
+def router_url(model_id):
+    return f"{ROUTER_URL}/{model_id}"
+
+
+def _configured_models():
+    env = os.getenv("WARMUP_MODELS")
+    if env:
+        return [m.strip() for m in env.split(",") if m.strip()]
+    return list(DEFAULT_MODELS)
+
+
+class ModelLoadingError(RuntimeError):
+    """Raised by a run_* wrapper when the model is still cold after MAX_WAIT"""
+
+    def __init__(self, model_id):
+        super().__init__(f"{model_id} is still loading")
+        self.model_id = model_id
+
+
+class WarmupScheduler:
+    def __init__(self, model_ids=None, token=None, clock=time.time):
+        self.model_ids = model_ids or _configured_models()
+        self.token = token if token is not None else os.getenv("HF_TOKEN")
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        # model_id -> {'state', 'ready_at' (expected, while loading), 'last_probe', 'last_status'}
+        self.readiness = {}
+        for model_id in self.model_ids:
+            self._entry(model_id)
+        self.hourly_traffic = [0.0] * 24
+        self._traffic_day = None
+
+    def _entry(self, model_id):
+        return self.readiness.setdefault(
+            model_id, {'state': UNKNOWN, 'ready_at': None, 'last_probe': None, 'last_status': None}
+        )
+
+    # --- traffic ---
+    def note_traffic(self, when=None):
+        """Record one forecast request (called from the ai_service endpoints)"""
+        when = when or datetime.fromtimestamp(self.clock())
+        with self._cond:
+            day = when.date()
+            if self._traffic_day is not None and day != self._traffic_day:
+                factor = TRAFFIC_DECAY ** (day - self._traffic_day).days
+                self.hourly_traffic = [c * factor for c in self.hourly_traffic]
+            self._traffic_day = day
+            self.hourly_traffic[when.hour] += 1.0
+
+    def is_busy_hour(self, hour):
+        """
+        Busy if the hour, or the one after it (warm ahead of the rush), gets at
+        least half its average share of traffic.
+        """
+        total = sum(self.hourly_traffic)
+        if total == 0:
+            return hour in DEFAULT_ACTIVE_HOURS or (hour + 1) % 24 in DEFAULT_ACTIVE_HOURS
+        threshold = 0.5 * total / 24
+        return (self.hourly_traffic[hour] >= threshold
+                or self.hourly_traffic[(hour + 1) % 24] >= threshold)
+
+    def probe_interval(self, model_id):
+        state = self.readiness[model_id]['state']
+        if state in (LOADING, UNKNOWN):
+            return LOADING_POLL
+        hour = datetime.fromtimestamp(self.clock()).hour
+        return ACTIVE_INTERVAL if self.is_busy_hour(hour) else IDLE_INTERVAL
+
+    # --- readiness ---
+    def note_response(self, model_id, status_code, body=None):
+        """
+        Update readiness from any response of `model_id`: a probe or a real
+        forecast call. Returns the new state.
+        """
+        now = self.clock()
+        if status_code == 200:
+            state, ready_at = READY, None
+        elif status_code == 503:
+            estimated = DEFAULT_LOAD_TIME
+            if isinstance(body, dict) and body.get('estimated_time'):
+                estimated = float(body['estimated_time'])
+            state, ready_at = LOADING, now + estimated
+        else:
+            state, ready_at = DOWN, None
+
+        with self._cond:
+            entry = self._entry(model_id)
+            if entry['state'] != state:
+                logger.info(f"🌡️  {model_id}: {entry['state']} -> {state}")
+            entry.update(state=state, ready_at=ready_at, last_status=status_code)
+            self._cond.notify_all()
+        return state
+
+    def observe(self, model_id, response):
+        """note_response for a requests.Response"""
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return self.note_response(model_id, response.status_code, body)
+
+    def state(self, model_id):
+        with self._cond:
+            return self.readiness.get(model_id, {}).get('state', UNKNOWN)
+
+    def wait_until_ready(self, model_id, max_wait=MAX_WAIT):
+        """
+        Block up to `max_wait` seconds while `model_id` is known to be loading.
+        Returns True when it is worth calling the model (ready, not known to be
+        loading, or its estimated load time has passed). A model expected to
+        take longer than `max_wait` is not waited for at all.
+        """
+        deadline = self.clock() + max_wait
+        with self._cond:
+            while True:
+                entry = self.readiness.get(model_id)
+                if entry is None or entry['state'] != LOADING:
+                    return True
+                now = self.clock()
+                if entry['ready_at'] is not None and now >= entry['ready_at']:
+                    return True
+                if now >= deadline or (entry['ready_at'] or now) > deadline:
+                    return False
+                wake_at = min(deadline, entry['ready_at'] or deadline)
+                self._cond.wait(timeout=max(0.01, min(wake_at - now, LOADING_POLL)))
+
+    # --- probing ---
+    def probe(self, model_id):
+        """Send the cheapest forecast request the model accepts"""
+        import requests
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        payload = {"inputs": [1.0] * 8, "parameters": {"prediction_length": 1}}
+        with self._cond:
+            self._entry(model_id)['last_probe'] = self.clock()
+        try:
+            response = requests.post(router_url(model_id), headers=headers, json=payload,
+                                     timeout=PROBE_TIMEOUT)
+            return self.observe(model_id, response)
+        except Exception as e:
+            logger.warning(f"⚠️  Warm-up probe for {model_id} failed: {e}")
+            return self.note_response(model_id, None)
+
+    def run_once(self):
+        """Probe every model whose interval has elapsed. Returns the ids probed."""
+        now = self.clock()
+        probed = []
+        for model_id in self.model_ids:
+            last = self.readiness[model_id]['last_probe']
+            if last is None or now - last >= self.probe_interval(model_id):
+                self.probe(model_id)
+                probed.append(model_id)
+        return probed
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Warm-up loop error: {e}")
+            self._stop.wait(1.0)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="model-warmup", daemon=True)
+        self._thread.start()
+        logger.info(f"🔥 Warm-up scheduler started for {len(self.model_ids)} models")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def status(self):
+        with self._cond:
+            report = {}
+            for model_id, entry in self.readiness.items():
+                report[model_id] = {
+                    "state": entry['state'],
+                    "last_status": entry['last_status'],
+                    "ready_in": (max(0.0, round(entry['ready_at'] - self.clock(), 1))
+                                 if entry['ready_at'] else None),
+                    "next_probe_in": round(max(0.0, (entry['last_probe'] or 0)
+                                               + self.probe_interval(model_id) - self.clock()), 1),
+                }
+            return report
+
+
+_scheduler = None
+
+def get_warmup():
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = WarmupScheduler()
+    return _scheduler
+
+
+# --- Local stub router for tests ---
+def run_loading_stub(port=0, load_seconds=3.0, idle_seconds=30.0):
+    """
+    Start an HTTP server imitating the HF router: a model that has been idle
+    for `idle_seconds` (or never called) answers 503 with estimated_time for
+    `load_seconds`, then returns flat forecasts. Returns (server, base_url).
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    state = {}  # model path -> {'loaded_at', 'last_call'}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            now = time.time()
+            with lock:
+                entry = state.get(self.path)
+                if entry is None or now - entry['last_call'] > idle_seconds:
+                    entry = state[self.path] = {'loaded_at': now + load_seconds, 'last_call': now}
+                entry['last_call'] = now
+                remaining = entry['loaded_at'] - now
+
+            if remaining > 0:
+                status, body = 503, {"error": "Model is currently loading", "estimated_time": remaining}
+            else:
+                inputs = payload.get('inputs') or [0.0]
+                horizon = payload.get('parameters', {}).get('prediction_length', 1)
+                status, body = 200, [float(inputs[-1])] * horizon
+
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/models"
+
+
+if __name__ == '__main__':
+    # Demo against the local stub: cold start, then a forecast that waits for loading
+    logging.basicConfig(level=logging.INFO)
+    server, ROUTER_URL = run_loading_stub(load_seconds=3.0)
+    scheduler = WarmupScheduler(model_ids=['amazon/chronos-t5-base'], token='')
+    print(f"Probe: {scheduler.probe('amazon/chronos-t5-base')}")
+    start = time.time()
+    ready = scheduler.wait_until_ready('amazon/chronos-t5-base')
+    print(f"Waited {time.time() - start:.1f}s, worth calling: {ready}")
+    print(f"Probe: {scheduler.probe('amazon/chronos-t5-base')}")
+    print(scheduler.status())
+    server.shutdown()
@@ -0,0 +1,227 @@
+"""
+Online ensemble weighting from realized actuals.
+
+Each pipeline run records what every model predicted for the coming days. When
+the actual admissions for a day arrive, every model that forecast that day gets
+its exponentially decayed error statistics updated in O(1). Ensemble weights
+and confidence are then derived straight from those statistics, without any
+batch re-evaluation. State is persisted to JSON so restarts keep the history.
+"""
+
+import os
+import json
+import math
+import logging
+import threading
+from datetime import datetime
+
+from ensemble import DEFAULT_WEIGHTS
+
+logger = logging.getLogger(__name__)
+
+STATE_PATH = os.path.join(os.path.dirname(__file__), "online_weights_state.json")
+
+GLOBAL_KEY = '__global__'
+ENSEMBLE_KEY = '__ensemble__'
+
+# Errors lose half their influence after this many observed days
+HALF_LIFE_DAYS = 14
+# Effective number of observations at which learned and prior weights count equally
+PRIOR_STRENGTH = 7.0
+# Days of pending predictions kept per series (longest supported horizon)
+MAX_PENDING_DAYS = 60
+
+# Percentage-error floor so a lucky streak cannot take all the weight
+MIN_ERROR = 0.01
+
+MIN_CONFIDENCE = 0.50
+MAX_CONFIDENCE = 0.95
+
+
+def _day(date):
+    """Normalize a date-like value to a YYYY-MM-DD key"""
+    if isinstance(date, str):
+        return date[:10]
+    if hasattr(date, 'strftime'):
+        return date.strftime('%Y-%m-%d')
+    return str(date)[:10]
+
+
+class OnlineEnsembleWeights:
+    def __init__(self, state_path=STATE_PATH, half_life_days=HALF_LIFE_DAYS,
+                 prior_weights=None, prior_strength=PRIOR_STRENGTH):
+        self.state_path = state_path
+        self.decay = 0.5 ** (1.0 / half_life_days)
+        self.prior_weights = prior_weights or DEFAULT_WEIGHTS
+        self.prior_strength = prior_strength
+        self._lock = threading.Lock()
+        # stats[series_key][model] = {'n': eff. count, 'abs': ewm |err|, 'ape': ewm |err|/actual}
+        self.stats = {}
+        # pending[series_key][day] = {model: predicted value}
+        self.pending = {}
+        self.last_actual_day = {}
+        self.load()
+
+    # --- Persistence ---
+    def load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+            self.stats = state.get('stats', {})
+            self.pending = state.get('pending', {})
+            self.last_actual_day = state.get('last_actual_day', {})
+            logger.info(f"✅ Loaded online ensemble state ({len(self.stats)} series)")
+        except Exception as e:
+            logger.warning(f"⚠️  Could not load online ensemble state: {e}")
+
+    def save(self):
+        if not self.state_path:
+            return
+        state = {
+            'stats': self.stats,
+            'pending': self.pending,
+            'last_actual_day': self.last_actual_day,
+            'saved_at': datetime.now().isoformat()
+        }
+        tmp_path = f"{self.state_path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not persist online ensemble state: {e}")
+
+    # --- Updates ---
+    def record_forecasts(self, forecasts, dates, ensemble_values=None, series_key=GLOBAL_KEY):
+        """Remember each model's prediction per future day until its actual arrives"""
+        with self._lock:
+            pending = self.pending.setdefault(series_key, {})
+            for step, date in enumerate(dates):
+                day = pending.setdefault(_day(date), {})
+                for model, values in forecasts.items():
+                    if step < len(values):
+                        day[model] = float(values[step])
+                if ensemble_values is not None and step < len(ensemble_values):
+                    day[ENSEMBLE_KEY] = float(ensemble_values[step])
+
+            # Bound memory: keep only the most recent days
+            if len(pending) > MAX_PENDING_DAYS:
+                for stale in sorted(pending)[:len(pending) - MAX_PENDING_DAYS]:
+                    del pending[stale]
+            self.save()
+
+    def _update_stat(self, series_key, model, error, actual):
+        stat = self.stats.setdefault(series_key, {}).setdefault(
+            model, {'n': 0.0, 'abs': 0.0, 'ape': 0.0}
+        )
+        d = self.decay
+        abs_err = abs(error)
+        ape = abs_err / max(abs(actual), 1.0)
+        # Decayed sums normalised by the decayed count == exponentially weighted means
+        n = d * stat['n'] + 1.0
+        stat['abs'] = (d * stat['n'] * stat['abs'] + abs_err) / n
+        stat['ape'] = (d * stat['n'] * stat['ape'] + ape) / n
+        stat['n'] = n
+
+    def _observe(self, day, actual, series_key):
+        if self.last_actual_day.get(series_key, '') >= day:
+            return False
+        predictions = self.pending.get(series_key, {}).pop(day, None)
+        self.last_actual_day[series_key] = day
+        if not predictions:
+            return False
+
+        actual = float(actual)
+        for model, predicted in predictions.items():
+            self._update_stat(series_key, model, predicted - actual, actual)
+            if series_key != GLOBAL_KEY:
+                self._update_stat(GLOBAL_KEY, model, predicted - actual, actual)
+        return True
+
+    def observe_actual(self, date, actual, series_key=GLOBAL_KEY):
+        """
+        Score every pending prediction for `date` against the realized value.
+        Updates the series' own stats and the global stats. O(n_models).
+        Returns True if anything was scored.
+        """
+        return self.observe_actuals([date], [actual], series_key=series_key) > 0
+
+    def observe_actuals(self, dates, actuals, series_key=GLOBAL_KEY):
+        """Feed (date, actual) pairs in date order; only days newer than the last seen are used"""
+        scored = 0
+        with self._lock:
+            last_day = self.last_actual_day.get(series_key)
+            for date, actual in zip(dates, actuals):
+                if actual is None or (isinstance(actual, float) and math.isnan(actual)):
+                    continue
+                if self._observe(_day(date), actual, series_key):
+                    scored += 1
+            if self.last_actual_day.get(series_key) != last_day:
+                self.save()
+        return scored
+
+    # --- Queries ---
+    def _stats_for(self, series_key, model):
+        stat = self.stats.get(series_key, {}).get(model)
+        if stat is None and series_key != GLOBAL_KEY:
+            stat = self.stats.get(GLOBAL_KEY, {}).get(model)
+        return stat
+
+    def weights(self, model_names, series_key=GLOBAL_KEY):
+        """
+        Blend prior weights with inverse-error weights.
+        The learned share grows with the amount of (decayed) evidence.
+        Models without a prior weight stay at zero, as in run_ensemble.
+        """
+        prior = {m: self.prior_weights.get(m, 0.0) for m in model_names}
+        prior_total = sum(prior.values())
+
+        learned = {}
+        evidence = []
+        for m in model_names:
+            if prior_total > 0 and prior[m] <= 0:
+                continue
+            stat = self._stats_for(series_key, m)
+            if stat and stat['n'] > 0:
+                learned[m] = 1.0 / max(stat['ape'], MIN_ERROR)
+                evidence.append(stat['n'])
+
+        if not learned:
+            return prior
+
+        learned_total = sum(learned.values())
+        n_eff = min(evidence)
+        share = n_eff / (n_eff + self.prior_strength)
+
+        blended = {}
+        for m in model_names:
+            p = prior[m] / prior_total if prior_total > 0 else 0.0
+            l = learned.get(m, 0.0) / learned_total
+            blended[m] = (1 - share) * p + share * l
+        return blended
+
+    def confidence(self, default, series_key=GLOBAL_KEY):
+        """Confidence from the ensemble's decayed percentage error, or `default` with no history"""
+        stat = self._stats_for(series_key, ENSEMBLE_KEY)
+        if not stat or stat['n'] <= 0:
+            return default
+        share = stat['n'] / (stat['n'] + self.prior_strength)
+        learned = min(MAX_CONFIDENCE, max(MIN_CONFIDENCE, 1.0 - stat['ape']))
+        return (1 - share) * default + share * learned
+
+    def summary(self, series_key=GLOBAL_KEY):
+        return {
+            model: {'mae': round(s['abs'], 3), 'mape': round(s['ape'], 4), 'n_eff': round(s['n'], 2)}
+            for model, s in self.stats.get(series_key, {}).items()
+        }
+
+
+_tracker = None
+
+def get_tracker():
+    global _tracker
+    if _tracker is None:
+        _tracker = OnlineEnsembleWeights()
+    return _tracker
@@ -8,30 +8,8 @@ import os
 # from neuralforecast.models import PatchTST, TFT # Uncomment when installed
 
 # --- Stage 1: KalmanNet (Noise Cleaning) ---
-class KalmanNet:
-    def __init__(self, process_variance=1e-5, measurement_variance=1e-1):
-        self.process_variance = process_variance
-        self.measurement_variance = measurement_variance
-        self.post_estimate = 0.0
-        self.post_error_estimate = 1.0
-
-    def update(self, measurement):
-        # Prediction step
-        prior_estimate = self.post_estimate
-        prior_error_estimate = self.post_error_estimate + self.process_variance
-
-        # Update step
-        blending_factor = prior_error_estimate / (prior_error_estimate + self.measurement_variance)
-        self.post_estimate = prior_estimate + blending_factor * (measurement - prior_estimate)
-        self.post_error_estimate = (1 - blending_factor) * prior_error_estimate
-        
-        return self.post_estimate
-
-    def clean_series(self, series):
-        cleaned = []
-        for val in series:
-            cleaned.append(self.update(val))
-        return cleaned
+# Shared batched implementation, see kalman_filter.py
+from kalman_filter import KalmanNet
 
 # --- Stage 2: NeuralProphet (Seasonality) ---
 def run_neural_prophet(df, horizon=14):
@@ -69,35 +47,8 @@ def run_neural_forecast(df, models=['PatchTST', 'TFT'], horizon=14):
     return results, dates
 
 # --- Stage 8: Ensemble ---
-def run_ensemble(forecasts):
-    # forecasts: dict of model_name -> list of values
-    # Simple weighted average
-    final_values = []
-    num_steps = len(list(forecasts.values())[0])
-    
-    weights = {
-        'NeuralProphet': 0.1,
-        'MOIRAI': 0.2,
-        'LagLlama': 0.1,
-        'PatchTST': 0.3, # High weight for trend
-        'TimesFM': 0.1,
-        'TFT': 0.2
-    }
-    
-    for i in range(num_steps):
-        weighted_sum = 0
-        total_weight = 0
-        for model, values in forecasts.items():
-            if model in weights:
-                weighted_sum += values[i] * weights[model]
-                total_weight += weights[model]
-        
-        if total_weight > 0:
-            final_values.append(weighted_sum / total_weight)
-        else:
-            final_values.append(0)
-            
-    return final_values
+# Shared vectorized engine, see ensemble.py
+from ensemble import run_ensemble
 
 # --- Stage 9: Role-Based Formatter ---
 def format_for_role(values, dates, role):
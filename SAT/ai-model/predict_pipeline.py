@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 import os
+import time
 import numpy as np
 import pandas as pd
 import logging
@@ -10,7 +11,8 @@ logger = logging.getLogger(__name__)
 # Import modules
 from data_loader import load_preprocessed_data, extract_admissions_series
 from kalman_filter import KalmanNet
-from seasonal_decompose import run_seasonal_decompose
+from kalman_state import get_kalman_store
+from seasonal_decompose import get_decomposition
 from model_chronos import run_chronos
 from model_moirai import run_moirai
 from model_lagllama import run_lagllama
@@ -18,6 +20,59 @@ from model_patchtst import run_patchtst
 from model_timesfm import run_timesfm
 from model_tft import run_tft
 from ensemble import run_ensemble
+from local_forecasters import fallback_forecast
+from online_weights import get_tracker, MAX_PENDING_DAYS, GLOBAL_KEY
+from model_health import CircuitOpenError
+from model_warmup import ModelLoadingError
+from response_cache import CacheMissError
+
+# Pipeline modes, cheapest first, with their latency budgets (seconds).
+#   fast:     local vectorized models only (PatchTST, TFT, trained model), no network
+#   standard: fast + remote foundation models that are served locally or cached
+#   full:     every model, calling the HF API on cache misses.
+# A model is not started when the time spent so far plus its last observed
+# run time in the same mode would exceed the budget, unless no forecast has
+# been produced yet. Such models are reported in budget_skipped_models.
+MODES = ('fast', 'standard', 'full')
+MODE_BUDGETS = {'fast': 0.5, 'standard': 1.5, 'full': 30.0}
+DEFAULT_MODE = 'full'
+
+# Last observed run time (seconds) per (mode, model), for the budget check.
+# Keyed by mode because a model's cost differs by mode (cache lookup in
+# standard, HF API call in full).
+_model_seconds = {}
+
+
+def _over_budget(mode, label, started, budget, have_forecast):
+    """
+    True when running `label` now is expected to overrun the budget. The
+    estimate is halved on every skip so one slow run doesn't exclude a model
+    for good.
+    """
+    if not have_forecast:
+        return False
+    expected = _model_seconds.get((mode, label), 0.0)
+    if time.perf_counter() - started + expected > budget:
+        _model_seconds[(mode, label)] = expected / 2
+        return True
+    return False
+
+
+def _timed(mode, label, run, *args, **kwargs):
+    """Call `run` and remember how long `label` took in `mode`"""
+    t0 = time.perf_counter()
+    try:
+        return run(*args, **kwargs)
+    finally:
+        _model_seconds[(mode, label)] = time.perf_counter() - t0
+
+# (step, forecast key, display name, log title, wrapper)
+REMOTE_MODELS = [
+    (3, 'Chronos', 'Chronos', 'Chronos (Amazon)', run_chronos),
+    (4, 'MOIRAI', 'MOIRAI', 'MOIRAI (Salesforce)', run_moirai),
+    (5, 'LagLlama', 'Lag-Llama', 'Lag-Llama', run_lagllama),
+    (6, 'TimesFM', 'TimesFM', 'TimesFM (Google)', run_timesfm),
+]
 
 def generate_hospital_alerts(forecast_values, historical_mean):
     """
@@ -153,22 +208,45 @@ def format_for_role(values, dates, role, historical_mean=100, custom_forecasts=N
     
     return formatted
 
-def generate_fallback_values(horizon):
+def generate_fallback_values(horizon, historical_data=None):
     """Generate simple fallback forecast when models fail"""
+    if historical_data is not None and len(historical_data) > 0:
+        return fallback_forecast(historical_data, horizon, method='theta', period=7)
     base = 120
-    return [base + i * 0.3 + np.random.normal(0, 3) for i in range(horizon)]
+    return [base + i * 0.3 for i in range(horizon)]
+
+def downgrade_mode(mode, in_flight, standard_at, fast_at):
+    """Cheaper mode when `in_flight` concurrent requests reach the given thresholds"""
+    if in_flight >= fast_at:
+        return 'fast'
+    if in_flight >= standard_at and mode == 'full':
+        return 'standard'
+    return mode
 
-def run_predict_pipeline(role='public', hf_token=None, horizon=14):
-    """Run full multi-model forecasting pipeline with comprehensive error handling"""
+def run_predict_pipeline(role='public', hf_token=None, horizon=14, mode=DEFAULT_MODE, series_key=GLOBAL_KEY):
+    """
+    Run the multi-model forecasting pipeline with comprehensive error handling.
+    `mode` trades accuracy for latency, see MODES / MODE_BUDGETS.
+    `series_key` (e.g. a hospital id) selects whose online ensemble statistics
+    weight this run and receive its forecasts for later scoring.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}'. Choose from {list(MODES)}")
+    started = time.perf_counter()
+    budget = MODE_BUDGETS[mode]
     
     logger.info("=" * 60)
     logger.info("🚀 Multi-Model Forecasting Pipeline Started")
-    logger.info(f"📊 Role: {role}, Horizon: {horizon} days")
+    logger.info(f"📊 Role: {role}, Horizon: {horizon} days, Mode: {mode}")
     logger.info("=" * 60)
     
     models_used = []
     failed_models = []
+    skipped_models = []
+    budget_skipped = []
+    model_spread = None
     historical_mean = 100 # Default
+    historical_dates = None
     
     # Load real data
     logger.info("📂 Loading raw data from CSV...")
@@ -192,8 +270,17 @@ def run_predict_pipeline(role='public', hf_token=None, horizon=14):
         
         if target_col in df.columns:
             historical_data = df[target_col].tail(90).tolist()
+            if 'date' in df.columns:
+                historical_dates = df['date'].tail(90).tolist()
             historical_mean = np.mean(historical_data)
             logger.info(f"✅ Loaded {len(historical_data)} days of raw data (mean: {historical_mean:.1f})")
+            
+            # Score earlier forecasts against any newly realized actuals
+            if 'date' in df.columns:
+                recent = df.tail(MAX_PENDING_DAYS)
+                scored = get_tracker().observe_actuals(recent['date'].tolist(), recent[target_col].tolist())
+                if scored:
+                    logger.info(f"📏 Scored previous forecasts against {scored} new actuals")
         else:
             raise ValueError(f"Target column {target_col} not found")
             
@@ -205,111 +292,117 @@ def run_predict_pipeline(role='public', hf_token=None, horizon=14):
     # Step 1: Kalman Filter (Noise Reduction) - with error handling
     logger.info("🔧 Step 1: KalmanNet - Noise Reduction")
     try:
-        kalman = KalmanNet()
-        cleaned_data = kalman.clean_series(historical_data)
+        if historical_dates is not None:
+            # Checkpointed state: only days newer than the last request are filtered
+            cleaned_data = get_kalman_store().clean(historical_dates, historical_data)
+        else:
+            kalman = KalmanNet()
+            cleaned_data = kalman.clean_series(historical_data)
         logger.info("   ✅ Kalman filtering complete")
     except Exception as e:
         logger.error(f"   ❌ Kalman filter failed: {e}")
         cleaned_data = historical_data  # Use raw data as fallback
         logger.warning("   ⚠️  Using raw data without Kalman filtering")
     
-    # Step 2: Seasonal Decomposition
+    # Step 2: Seasonal Decomposition (computed once per data version, shared downstream)
+    # Fit on the cleaned window the local models deseasonalize: the Kalman step
+    # smooths away most of the weekly cycle, so a profile estimated on the raw
+    # history would be subtracted from a series that no longer has it.
     logger.info("🔧 Step 2: Seasonal Decomposition")
+    decomposition = None
+    dates = [datetime.now() + timedelta(days=i+1) for i in range(horizon)]
     try:
-        seasonal_forecast = run_seasonal_decompose(None, horizon=horizon)
-        dates = [datetime.now() + timedelta(days=i+1) for i in range(horizon)]
+        decomposition = get_decomposition(np.asarray(cleaned_data, dtype=float))
         logger.info("   ✅ Seasonal pattern extracted")
     except Exception as e:
         logger.error(f"   ❌ Seasonal decomposition failed: {e}")
-        dates = [datetime.now() + timedelta(days=i+1) for i in range(horizon)]
     
     # Initialize forecast storage
     all_forecasts = {}
     
-    # Step 3: Chronos - with error handling
-    logger.info("🤖 Step 3: Chronos (Amazon)")
-    try:
-        chronos_vals = run_chronos(cleaned_data, token=hf_token, horizon=horizon)
-        all_forecasts['Chronos'] = chronos_vals
-        models_used.append('Chronos')
-        logger.info("   ✅ Chronos complete")
-    except Exception as e:
-        logger.error(f"   ❌ Chronos failed: {e}")
-        failed_models.append('Chronos')
-    
-    # Step 4: MOIRAI - with error handling
-    logger.info("🤖 Step 4: MOIRAI (Salesforce)")
-    try:
-        moirai_vals = run_moirai(cleaned_data, token=hf_token, horizon=horizon)
-        all_forecasts['MOIRAI'] = moirai_vals
-        models_used.append('MOIRAI')
-        logger.info("   ✅ MOIRAI complete")
-    except Exception as e:
-        logger.error(f"   ❌ MOIRAI failed: {e}")
-        failed_models.append('MOIRAI')
-    
-    # Step 5: Lag-Llama - with error handling
-    logger.info("🤖 Step 5: Lag-Llama")
-    try:
-        lag_vals = run_lagllama(cleaned_data, token=hf_token, horizon=horizon)
-        all_forecasts['LagLlama'] = lag_vals
-        models_used.append('Lag-Llama')
-        logger.info("   ✅ Lag-Llama complete")
-    except Exception as e:
-        logger.error(f"   ❌ Lag-Llama failed: {e}")
-        failed_models.append('Lag-Llama')
-    
-    # Step 6: TimesFM - with error handling
-    logger.info("🤖 Step 6: TimesFM (Google)")
-    try:
-        times_vals = run_timesfm(cleaned_data, token=hf_token, horizon=horizon)
-        all_forecasts['TimesFM'] = times_vals
-        models_used.append('TimesFM')
-        logger.info("   ✅ TimesFM complete")
-    except Exception as e:
-        logger.error(f"   ❌ TimesFM failed: {e}")
-        failed_models.append('TimesFM')
+    # Steps 3-6: remote foundation models (local runtime / cache / HF API)
+    for step, key, label, title, run_model in REMOTE_MODELS:
+        if mode == 'fast':
+            continue
+        logger.info(f"🤖 Step {step}: {title}")
+        if _over_budget(mode, label, started, budget, bool(all_forecasts)):
+            logger.warning(f"   ⏭️  {label} skipped: latency budget exceeded")
+            budget_skipped.append(label)
+            continue
+        try:
+            values = _timed(mode, label, run_model, cleaned_data, token=hf_token, horizon=horizon,
+                            cache_only=(mode == 'standard'))
+            all_forecasts[key] = values
+            models_used.append(label)
+            logger.info(f"   ✅ {label} complete")
+        except CacheMissError:
+            logger.info(f"   ⏭️  {label} not cached, skipped in {mode} mode")
+        except (CircuitOpenError, ModelLoadingError) as e:
+            logger.warning(f"   ⏭️  {label} skipped: {e}")
+            skipped_models.append(label)
+        except Exception as e:
+            logger.error(f"   ❌ {label} failed: {e}")
+            failed_models.append(label)
     
     # Step 7: PatchTST - with error handling
     logger.info("🤖 Step 7: PatchTST")
-    try:
-        patch_vals = run_patchtst(cleaned_data, horizon=horizon)
-        all_forecasts['PatchTST'] = patch_vals
-        models_used.append('PatchTST')
-        logger.info("   ✅ PatchTST complete")
-    except Exception as e:
-        logger.error(f"   ❌ PatchTST failed: {e}")
-        failed_models.append('PatchTST')
+    if _over_budget(mode, 'PatchTST', started, budget, bool(all_forecasts)):
+        logger.warning("   ⏭️  PatchTST skipped: latency budget exceeded")
+        budget_skipped.append('PatchTST')
+    else:
+        try:
+            patch_vals = _timed(mode, 'PatchTST', run_patchtst, cleaned_data, horizon=horizon, decomposition=decomposition)
+            all_forecasts['PatchTST'] = patch_vals
+            models_used.append('PatchTST')
+            logger.info("   ✅ PatchTST complete")
+        except Exception as e:
+            logger.error(f"   ❌ PatchTST failed: {e}")
+            failed_models.append('PatchTST')
     
     # Step 8: TFT - with error handling
     logger.info("🤖 Step 8: TFT")
-    try:
-        tft_vals = run_tft(cleaned_data, horizon=horizon)
-        all_forecasts['TFT'] = tft_vals
-        models_used.append('TFT')
-        logger.info("   ✅ TFT complete")
-    except Exception as e:
-        logger.error(f"   ❌ TFT failed: {e}")
-        failed_models.append('TFT')
+    if _over_budget(mode, 'TFT', started, budget, bool(all_forecasts)):
+        logger.warning("   ⏭️  TFT skipped: latency budget exceeded")
+        budget_skipped.append('TFT')
+    else:
+        try:
+            tft_vals = _timed(mode, 'TFT', run_tft, cleaned_data, horizon=horizon, decomposition=decomposition)
+            all_forecasts['TFT'] = tft_vals
+            models_used.append('TFT')
+            logger.info("   ✅ TFT complete")
+        except Exception as e:
+            logger.error(f"   ❌ TFT failed: {e}")
+            failed_models.append('TFT')
 
     # Step 8.5: Custom Trained Model (Random Forest) - Multi-Target
+    # The recursive multi-target forecast is the slowest local step; it is the
+    # first one dropped when fast/standard mode is short on time.
     logger.info("🤖 Step 8.5: Custom Trained Model (Multi-Target)")
     custom_forecasts = None
-    try:
-        from model_trained import run_trained_model
-        custom_forecasts = run_trained_model(cleaned_data, horizon=horizon)
-        # We'll use the 'admissions' part for the main ensemble
-        all_forecasts['CustomTrained'] = custom_forecasts['admissions']
-        models_used.append('CustomTrained')
-        logger.info("   ✅ Custom Trained Model complete")
-    except Exception as e:
-        logger.error(f"   ❌ Custom Trained Model failed: {e}")
-        failed_models.append('CustomTrained')
+    if _over_budget(mode, 'CustomTrained', started, budget, bool(all_forecasts)):
+        logger.warning("   ⏭️  Custom Trained Model skipped: latency budget exceeded")
+        budget_skipped.append('CustomTrained')
+    else:
+        try:
+            from model_trained import run_trained_model
+            custom_forecasts = _timed(mode, 'CustomTrained', run_trained_model, cleaned_data, horizon=horizon)
+            # We'll use the 'admissions' part for the main ensemble
+            all_forecasts['CustomTrained'] = custom_forecasts['admissions']
+            models_used.append('CustomTrained')
+            logger.info("   ✅ Custom Trained Model complete")
+        except Exception as e:
+            logger.error(f"   ❌ Custom Trained Model failed: {e}")
+            failed_models.append('CustomTrained')
     
     # Log model success summary
-    logger.info(f"📊 Model Summary: {len(models_used)} successful, {len(failed_models)} failed")
+    logger.info(f"📊 Model Summary: {len(models_used)} successful, {len(failed_models)} failed, "
+                f"{len(skipped_models)} skipped, {len(budget_skipped)} over budget")
     if failed_models:
         logger.warning(f"⚠️  Failed models: {', '.join(failed_models)}")
+    if skipped_models:
+        logger.warning(f"⚠️  Skipped models: {', '.join(skipped_models)}")
+    if budget_skipped:
+        logger.info(f"⏭️  Not started to stay within the {mode} budget: {', '.join(budget_skipped)}")
     
     # Step 9: Ensemble - Combining predictions
     logger.info("🔄 Step 9: Ensemble - Combining predictions")
@@ -317,18 +410,22 @@ def run_predict_pipeline(role='public', hf_token=None, horizon=14):
         if len(all_forecasts) == 0:
             # All models failed - use fallback
             logger.error("❌ All models failed! Using fallback prediction")
-            final_values = generate_fallback_values(horizon)
+            final_values = generate_fallback_values(horizon, cleaned_data)
             models_used = ['Fallback Statistical Model']
             ensemble_confidence = 0.50
         else:
-            final_values = run_ensemble(all_forecasts)
-            # Adjust confidence based on number of successful models
-            ensemble_confidence = 0.65 + (len(models_used) / 6) * 0.25
+            tracker = get_tracker()
+            weights = tracker.weights(list(all_forecasts.keys()), series_key=series_key)
+            final_values, model_spread = run_ensemble(all_forecasts, weights=weights, return_spread=True)
+            # Confidence from realized ensemble error, model count until there is history
+            ensemble_confidence = tracker.confidence(default=0.65 + (len(models_used) / 6) * 0.25,
+                                                     series_key=series_key)
+            tracker.record_forecasts(all_forecasts, dates, final_values, series_key=series_key)
             logger.info(f"   ✅ Ensemble complete (mean: {np.mean(final_values):.1f})")
             logger.info(f"   📈 Ensemble confidence: {ensemble_confidence:.2%}")
     except Exception as e:
         logger.error(f"   ❌ Ensemble failed: {e}")
-        final_values = generate_fallback_values(horizon)
+        final_values = generate_fallback_values(horizon, cleaned_data)
         models_used = ['Fallback Statistical Model']
         ensemble_confidence = 0.50
     
@@ -339,15 +436,35 @@ def run_predict_pipeline(role='public', hf_token=None, horizon=14):
         final_output = format_for_role(final_values, dates, role, historical_mean, custom_forecasts)
         final_output['models_used'] = models_used
         final_output['ensemble_confidence'] = ensemble_confidence
+        final_output['mode'] = mode
+        final_output['latency_budget_ms'] = int(budget * 1000)
+        if model_spread is not None:
+            # Weighted std across models per step (disagreement between models)
+            final_output['model_spread'] = [round(float(s), 2) for s in model_spread]
         
+        warnings = []
         if failed_models:
-            final_output['warnings'] = f"Some models failed: {', '.join(failed_models)}"
+            warnings.append(f"Some models failed: {', '.join(failed_models)}")
+        if skipped_models:
+            # Remote endpoints marked unhealthy or still loading
+            warnings.append(f"Skipped unavailable models: {', '.join(skipped_models)}")
+            final_output['skipped_models'] = skipped_models
+        if budget_skipped:
+            warnings.append(f"Skipped to stay within the {mode} latency budget: {', '.join(budget_skipped)}")
+            final_output['budget_skipped_models'] = budget_skipped
+        if warnings:
+            final_output['warnings'] = "; ".join(warnings)
         
         logger.info("   ✅ Forecast ready")
     except Exception as e:
         logger.error(f"   ❌ Formatting failed: {e}")
         raise  # Re-raise to trigger fallback in ai_service.py
     
+    final_output['latency_ms'] = int((time.perf_counter() - started) * 1000)
+    if final_output['latency_ms'] > final_output['latency_budget_ms']:
+        logger.warning(f"⏱️  {mode} mode took {final_output['latency_ms']}ms "
+                       f"(budget {final_output['latency_budget_ms']}ms)")
+    
     logger.info("=" * 60)
     logger.info("✅ Pipeline Complete!")
     logger.info("=" * 60)
@@ -0,0 +1,216 @@
+"""
+Token-budgeted context for /chat prompts.
+
+The live hospital snapshot grows with the census, so it is not pasted into the
+prompt wholesale. Context is added in order of relevance until the budget is
+spent:
+
+    1. aggregates (total patients, status breakdown) and the high-risk list
+    2. patients named in the question
+    3. retrieved knowledge-base documents, in score order
+    4. the most recently updated remaining patients
+
+Patients that don't fit are folded into a single summary line (counts by
+status and most common complaints), so prompt size stays bounded however many
+patients are admitted.
+
+Token counts use the tokenizer named by CHAT_TOKENIZER when it can be loaded,
+otherwise a ~4 characters per token estimate.
+
+Environment:
+    CHAT_PROMPT_TOKENS   budget for the whole prompt, system + user (default 1500)
+    CHAT_TOKENIZER       Hugging Face tokenizer name or path used for counting (optional)
+"""
+
+import os
+import re
+import math
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TOKENS = int(os.getenv("CHAT_PROMPT_TOKENS", "1500"))
+TOKENIZER = os.getenv("CHAT_TOKENIZER", "")
+CHARS_PER_TOKEN = 4
+# Longest excerpt of a knowledge-base document, and the shortest worth including
+DOC_CHARS = 300
+MIN_DOC_TOKENS = 40
+# Kept free for the summary of patients that didn't fit
+SUMMARY_RESERVE = 60
+TOP_COMPLAINTS = 3
+# Longest complaint quoted in the summary
+COMPLAINT_CHARS = 40
+
+_tokenizer = None
+_tokenizer_loaded = False
+
+
+def get_tokenizer():
+    """CHAT_TOKENIZER, or None to fall back to the character estimate"""
+    global _tokenizer, _tokenizer_loaded
+    if not _tokenizer_loaded:
+        _tokenizer_loaded = True
+        if TOKENIZER:
+            try:
+                from transformers import AutoTokenizer
+                _tokenizer = AutoTokenizer.from_pretrained(TOKENIZER)
+            except Exception as e:
+                logger.warning(f"⚠️  Could not load tokenizer '{TOKENIZER}' ({e}), estimating tokens")
+    return _tokenizer
+
+
+def count_tokens(text):
+    if not text:
+        return 0
+    tokenizer = get_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text, max_tokens):
+    if count_tokens(text) <= max_tokens:
+        return text
+    tokenizer = get_tokenizer()
+    if tokenizer is not None:
+        ids = tokenizer.encode(text, add_special_tokens=False)[:max_tokens]
+        return tokenizer.decode(ids)
+    return text[:max_tokens * CHARS_PER_TOKEN]
+
+
+def patient_line(patient):
+    return (f"- {str(patient.get('name', '')).title()} ({patient.get('age')}y, {patient.get('status')}): "
+            f"{patient.get('chiefComplaint', 'No complaint')}")
+
+
+def mentioned_patients(question, patients):
+    """
+    Patients named in `question`. Full-name matches win; without any, patients
+    sharing a name part longer than 2 letters, most parts matched first.
+    """
+    words = set(re.findall(r"[a-z']+", question.lower()))
+    text = question.lower()
+    full, partial = [], []
+    for patient in patients:
+        name = str(patient.get('name', '')).lower().strip()
+        parts = [p for p in re.findall(r"[a-z']+", name) if len(p) > 2]
+        if not name:
+            continue
+        if re.search(rf"\b{re.escape(name)}\b", text):
+            full.append(patient)
+        else:
+            matched = sum(p in words for p in parts)
+            if matched:
+                partial.append((matched, patient))
+    if full:
+        return full
+    return [patient for _, patient in sorted(partial, key=lambda item: -item[0])]
+
+
+def summarize_patients(patients):
+    """One line standing in for patients left out of the detailed list"""
+    statuses = Counter(str(p.get('status')) for p in patients)
+    complaints = Counter(str(p.get('chiefComplaint')).lower()[:COMPLAINT_CHARS]
+                         for p in patients if p.get('chiefComplaint'))
+    line = f"- ...and {len(patients)} more patients (" + ", ".join(
+        f"{status}: {count}" for status, count in statuses.most_common()) + ")"
+    if complaints:
+        line += "; most common complaints: " + ", ".join(
+            f"{complaint} ({count})" for complaint, count in complaints.most_common(TOP_COMPLAINTS))
+    return line
+
+
+def budget_context(question, fixed_text, snapshot, documents, budget=PROMPT_TOKENS):
+    """
+    Live-status and knowledge-base context for one question, within `budget`
+    tokens including `fixed_text` (the role prompt and instructions) and the
+    question itself.
+
+    `snapshot` is get_real_time_patient_data() output (or None); `documents`
+    are retrieval hits with .payload['title'] / ['content'], best first.
+    Returns (live_context, rag_context, report).
+    """
+    remaining = budget - count_tokens(fixed_text) - count_tokens(question)
+    report = {"budget": budget, "patients_listed": 0, "patients_summarized": 0, "documents": 0}
+
+    live_head = live_tail = ""
+    patient_lines = []
+    if snapshot:
+        live_head = (
+            "\n\n### LIVE HOSPITAL STATUS (REAL-TIME) ###\n"
+            f"- Total Patients Admitted: {snapshot['total_patients']}\n"
+            f"- Status Breakdown: {snapshot['status_breakdown']}\n"
+            f"- Critical/High Risk Patients: {snapshot['high_risk_summary']}\n"
+            "\n### DETAILED PATIENT LIST ###\n"
+        )
+        live_tail = "\n\nUse this data to answer questions about specific patients, occupancy, and status."
+        remaining -= count_tokens(live_head) + count_tokens(live_tail)
+
+    patients = list(snapshot.get('patients', [])) if snapshot else []
+    if patients:
+        remaining -= SUMMARY_RESERVE
+    named = mentioned_patients(question, patients)
+    for patient in named:
+        line = patient_line(patient)
+        cost = count_tokens(line + "\n")
+        if cost > remaining:
+            break
+        patient_lines.append(line)
+        remaining -= cost
+
+    rag_context = ""
+    if documents:
+        rag_head = "\n\nRelevant Information from Knowledge Base:\n"
+        remaining -= count_tokens(rag_head)
+        entries = []
+        for i, result in enumerate(documents, 1):
+            prefix = f"\n{i}. {result.payload['title']}: "
+            room = remaining - count_tokens(prefix) - count_tokens("...\n")
+            if room < MIN_DOC_TOKENS:
+                break
+            content = truncate_to_tokens(result.payload['content'][:DOC_CHARS], room)
+            entry = f"{prefix}{content}...\n"
+            entries.append(entry)
+            remaining -= count_tokens(entry)
+        if entries:
+            rag_context = rag_head + "".join(entries)
+            report["documents"] = len(entries)
+        else:
+            remaining += count_tokens(rag_head)
+
+    listed = {id(p) for p in named[:len(patient_lines)]}
+    rest = [p for p in patients if id(p) not in listed]
+    recent = []  # (patient, cost) listed from `rest`, most recent last
+    for j, patient in enumerate(rest):
+        line = patient_line(patient)
+        cost = count_tokens(line + "\n")
+        # The summary reserve is free once no patient would be left out
+        if cost > remaining + (SUMMARY_RESERVE if j == len(rest) - 1 else 0):
+            break
+        patient_lines.append(line)
+        listed.add(id(patient))
+        recent.append((patient, cost))
+        remaining -= cost
+    omitted = [p for p in patients if id(p) not in listed]
+    if omitted:
+        summary = summarize_patients(omitted)
+        # The reserve is an estimate: fold listed patients back into the
+        # summary until it fits, and cut it as a last resort
+        while count_tokens(summary + "\n") > remaining + SUMMARY_RESERVE and recent:
+            patient, cost = recent.pop()
+            patient_lines.pop()
+            listed.discard(id(patient))
+            remaining += cost
+            omitted = [p for p in patients if id(p) not in listed]
+            summary = summarize_patients(omitted)
+        patient_lines.append(truncate_to_tokens(summary, max(remaining + SUMMARY_RESERVE - 1, 0)))
+
+    live_context = ""
+    if snapshot:
+        live_context = live_head + ("\n".join(patient_lines) or "No data") + live_tail
+    report["patients_listed"] = len(listed)
+    report["patients_summarized"] = len(omitted)
+    report["tokens"] = (count_tokens(fixed_text) + count_tokens(question)
+                        + count_tokens(live_context) + count_tokens(rag_context))
+    return live_context, rag_context, report
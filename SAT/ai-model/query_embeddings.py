@@ -0,0 +1,130 @@
+"""
+Cached, micro-batched query embeddings for /chat retrieval.
+
+Dashboards and quick-reply buttons send the same few questions over and over,
+so query vectors are cached by normalized text (LRU). Misses are not encoded
+on the request thread: they are queued, and a worker collects whatever arrives
+within a short window into a single `encode` call. Concurrent identical
+queries share one encode.
+
+Environment:
+    QUERY_CACHE_SIZE      cached query vectors (default 2048)
+    QUERY_BATCH_WINDOW_MS how long the worker waits to fill a batch (default 5)
+    QUERY_MAX_BATCH       largest batch passed to encode (default 32)
+"""
+
+import os
+import re
+import queue
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+BATCH_WINDOW = float(os.getenv("QUERY_BATCH_WINDOW_MS", "5")) / 1000.0
+MAX_BATCH = int(os.getenv("QUERY_MAX_BATCH", "32"))
+# Longest a request waits for its vector before giving up
+ENCODE_TIMEOUT = 30.0
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text):
+    """Case, unicode form, whitespace and surrounding punctuation don't change the vector key"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text.strip(" ?!.,;:")
+
+
+class QueryEmbedder:
+    def __init__(self, model, max_entries=CACHE_SIZE, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        self.model = model
+        self.max_entries = max_entries
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._cache = OrderedDict()
+        self._inflight = {}  # key -> Future shared by concurrent identical queries
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self.batched_queries = 0
+
+    def encode(self, text):
+        """Embedding of `text` as a list of floats"""
+        key = normalize_query(text)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = Future()
+                self._queue.put(key)
+                self._ensure_worker()
+        return future.result(timeout=ENCODE_TIMEOUT)
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="query-embedder", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Give concurrent requests a moment to join this batch
+            try:
+                while len(batch) < self.max_batch:
+                    batch.append(self._queue.get(timeout=self.batch_window))
+            except queue.Empty:
+                pass
+            self._encode_batch(batch)
+
+    def _encode_batch(self, keys):
+        try:
+            # Encode the normalized text so a key's vector doesn't depend on
+            # which spelling of the question arrived first
+            vectors = self.model.encode(keys)
+            results = [v.tolist() if hasattr(v, 'tolist') else list(v) for v in vectors]
+            error = None
+        except Exception as e:
+            logger.error(f"❌ Query embedding batch failed: {e}")
+            results, error = None, e
+
+        with self._lock:
+            self.batches += 1
+            self.batched_queries += len(keys)
+            futures = [self._inflight.pop(key) for key in keys]
+            if error is None:
+                for key, vector in zip(keys, results):
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+
+        for i, future in enumerate(futures):
+            if error is None:
+                future.set_result(results[i])
+            else:
+                future.set_exception(error)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "batches": self.batches,
+                "avg_batch_size": self.batched_queries / self.batches if self.batches else 0.0,
+            }
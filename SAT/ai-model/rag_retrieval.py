@@ -0,0 +1,69 @@
+"""
+Role-aware retrieval for the RAG chat.
+
+Each chat role only searches the knowledge-base categories relevant to it, and
+only the payload fields the prompt uses are returned. Categories are a keyword
+payload index in Qdrant, so the filter is applied inside the vector search
+rather than after it. Documents ingested from the root of a --dir tree have
+category 'documents' and are visible to every role.
+"""
+
+import logging
+
+from qdrant_client.models import Filter, FieldCondition, MatchAny, PayloadSchemaType
+
+from quantize_collection import search_params
+from vector_index import get_vector_index
+
+logger = logging.getLogger(__name__)
+
+RAG_COLLECTION_NAME = "healthcare_docs"
+DEFAULT_ROLE = 'public'
+ROLE_CATEGORIES = {
+    'hospital_staff': ('hospital_operations', 'best_practices', 'health_factors', 'documents'),
+    'pharmacy': ('medicine_demand', 'best_practices', 'health_factors', 'documents'),
+    'admin': ('admin_policy', 'hospital_operations', 'medicine_demand', 'health_factors', 'documents'),
+    'public': ('health_factors', 'best_practices', 'documents'),
+}
+# Payload fields the chat prompt reads
+RETRIEVAL_FIELDS = ['title', 'content']
+INDEXED_FIELDS = {'category': PayloadSchemaType.KEYWORD}
+
+
+def role_categories(role):
+    return ROLE_CATEGORIES.get(role, ROLE_CATEGORIES[DEFAULT_ROLE])
+
+
+def role_filter(role):
+    """Qdrant filter restricting a search to the categories `role` may see"""
+    return Filter(must=[FieldCondition(key="category", match=MatchAny(any=list(role_categories(role))))])
+
+
+def create_payload_indexes(client, collection_name=RAG_COLLECTION_NAME):
+    """Index the payload fields retrieval filters on (no-op if they already exist)"""
+    existing = client.get_collection(collection_name).payload_schema or {}
+    for field, schema in INDEXED_FIELDS.items():
+        if field not in existing:
+            client.create_payload_index(collection_name=collection_name, field_name=field,
+                                        field_schema=schema)
+            logger.info(f"✅ Payload index on '{field}' created")
+
+
+def retrieve(client, query_vector, role=DEFAULT_ROLE, limit=2, collection_name=RAG_COLLECTION_NAME):
+    """
+    Top `limit` documents for `role`, each with .score and a payload holding
+    only RETRIEVAL_FIELDS. Served from the memory-mapped export when one has
+    been published, otherwise from Qdrant.
+    """
+    vector_index = get_vector_index()
+    if vector_index is not None:
+        return vector_index.search(query_vector, limit=limit, categories=role_categories(role),
+                                   fields=RETRIEVAL_FIELDS)
+    return client.query_points(
+        collection_name=collection_name,
+        query=query_vector,
+        query_filter=role_filter(role),
+        with_payload=RETRIEVAL_FIELDS,
+        limit=limit,
+        search_params=search_params()
+    ).points
@@ -0,0 +1,155 @@
+"""
+Cache for remote forecaster responses.
+
+Between data updates the same cleaned series is sent to the same remote models
+over and over. Responses are cached per (model id, horizon, hash of the input
+series) in an in-memory LRU, optionally backed by SQLite so they survive
+restarts. Each model can have its own TTL.
+
+Environment:
+    REMOTE_CACHE_SIZE   max in-memory entries (default 512)
+    REMOTE_CACHE_PATH   SQLite file for the persistent tier ('' disables it)
+    REMOTE_CACHE_TTL    default TTL in seconds (default 6 hours)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZE = int(os.getenv("REMOTE_CACHE_SIZE", "512"))
+DEFAULT_PATH = os.getenv(
+    "REMOTE_CACHE_PATH", os.path.join(os.path.dirname(__file__), "remote_cache.sqlite")
+)
+DEFAULT_TTL = float(os.getenv("REMOTE_CACHE_TTL", str(6 * 3600)))
+
+# Per-model TTL overrides (seconds)
+MODEL_TTLS = {
+    'amazon/chronos-t5-base': 6 * 3600,
+    'Salesforce/moirai-1.0-R-small': 6 * 3600,
+    'time-series-foundation-models/Lag-Llama': 3 * 3600,
+    'google/timesfm-1.0-200m': 12 * 3600,
+}
+
+
+class CacheMissError(LookupError):
+    """Raised by a run_* wrapper asked for cached results only when there are none"""
+
+
+def series_hash(series):
+    values = np.ascontiguousarray(np.asarray(series, dtype=np.float64))
+    digest = hashlib.sha256(values.tobytes())
+    digest.update(str(values.shape).encode())
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_entries=DEFAULT_SIZE, path=DEFAULT_PATH, default_ttl=DEFAULT_TTL, ttls=None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = dict(MODEL_TTLS if ttls is None else ttls)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.warning(f"⚠️  Remote response cache: SQLite disabled ({e})")
+                self._db = None
+
+    def ttl_for(self, model_id):
+        return self.ttls.get(model_id, self.default_ttl)
+
+    @staticmethod
+    def make_key(model_id, horizon, series):
+        return f"{model_id}|{int(horizon)}|{series_hash(series)}"
+
+    def get(self, model_id, horizon, series):
+        key = self.make_key(model_id, horizon, series)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return list(value)
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if row[1] > now:
+                        value = json.loads(row[0])
+                        self._remember(key, value, row[1])
+                        self.hits += 1
+                        return list(value)
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, model_id, horizon, series, forecast):
+        key = self.make_key(model_id, horizon, series)
+        try:
+            value = [float(v) for v in forecast]
+        except (TypeError, ValueError):
+            # Not a flat numeric forecast; don't cache what we can't replay
+            return
+        expires_at = time.time() + self.ttl_for(model_id)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(value), expires_at)
+                    )
+                    self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+                    self._db.commit()
+                except Exception as e:
+                    logger.warning(f"⚠️  Remote response cache write failed: {e}")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+_cache = None
+
+def get_response_cache():
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
@@ -1,21 +1,159 @@
-import numpy as np
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-# from neuralprophet import NeuralProphet # Uncomment when installed
-
-def run_seasonal_decompose(df, horizon=14):
-    """
-    Decomposes seasonality using NeuralProphet.
-    Returns a list of dictionaries with 'ds' and 'yhat'.
-    """
-    # Mocking for now to avoid heavy install delay/runtime overhead in demo
-    # In real impl:
-    # m = NeuralProphet()
-    # m.fit(df)
-    # future = m.make_future_dataframe(df, periods=horizon)
-    # forecast = m.predict(future)
-    # return forecast
-    
-    # Mock return
-    dates = [datetime.now() + timedelta(days=i) for i in range(horizon)]
-    # Simulate seasonality with sine wave
-    return [{"ds": d, "yhat": 100 + np.sin(i/2)*10} for i, d in enumerate(dates)]
+
+import numpy as np
+
+WEEKLY = 7
+YEARLY = 365
+
+# Decompositions kept in memory, keyed by data fingerprint
+CACHE_SIZE = 32
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _centered_mean(values, window):
+    """
+    Centered moving average along the last axis, vectorized across series.
+    Near the edges the window shrinks to what is available instead of leaving NaN.
+    """
+    n = values.shape[1]
+    half = window // 2
+    csum = np.concatenate([np.zeros((values.shape[0], 1)), np.cumsum(values, axis=1)], axis=1)
+    t = np.arange(n)
+    lo = np.clip(t - half, 0, n)
+    hi = np.clip(t + half + 1, 0, n)
+    return (csum[:, hi] - csum[:, lo]) / (hi - lo)
+
+
+def _phase_means(values, period):
+    """Mean per phase (position % period), centered to sum to zero. Returns (n_series, period)."""
+    n = values.shape[1]
+    phase = np.arange(n) % period
+    counts = np.bincount(phase, minlength=period)
+    sums = np.zeros((values.shape[0], period))
+    np.add.at(sums.T, phase, values.T)
+    means = sums / np.maximum(counts, 1)
+    return means - means.mean(axis=1, keepdims=True)
+
+
+def decompose(series, weekly=True, yearly=None):
+    """
+    Classical additive decomposition of one series or an (n_series, length) batch:
+    series = trend + weekly + yearly + resid
+
+    The yearly component is estimated only with at least two full years
+    (yearly=None decides automatically). Components are returned as arrays with
+    the same shape as the input plus per-phase seasonal profiles for forecasting.
+    """
+    values = np.asarray(series, dtype=float)
+    single = values.ndim == 1
+    values = np.atleast_2d(values)
+    n = values.shape[1]
+
+    if yearly is None:
+        yearly = n >= 2 * YEARLY
+    weekly = weekly and n >= 2 * WEEKLY
+
+    trend = _centered_mean(values, YEARLY if yearly else WEEKLY)
+    detrended = values - trend
+
+    weekly_profile = _phase_means(detrended, WEEKLY) if weekly else np.zeros((values.shape[0], WEEKLY))
+    weekly_component = weekly_profile[:, np.arange(n) % WEEKLY]
+
+    if yearly:
+        smoothed = _centered_mean(detrended - weekly_component, WEEKLY)
+        yearly_profile = _phase_means(smoothed, YEARLY)
+    else:
+        yearly_profile = np.zeros((values.shape[0], YEARLY))
+    yearly_component = yearly_profile[:, np.arange(n) % YEARLY]
+
+    resid = values - trend - weekly_component - yearly_component
+
+    result = {
+        'length': n,
+        'trend': trend,
+        'weekly': weekly_component,
+        'yearly': yearly_component,
+        'resid': resid,
+        'weekly_profile': weekly_profile,
+        'yearly_profile': yearly_profile,
+    }
+    if single:
+        result = {k: (v[0] if isinstance(v, np.ndarray) else v) for k, v in result.items()}
+    result['batched'] = not single
+    return result
+
+
+def seasonal_forecast(decomposition, horizon=14):
+    """Seasonal (weekly + yearly) component for the `horizon` steps after the data ends"""
+    n = decomposition['length']
+    steps = n + np.arange(horizon)
+    weekly = np.asarray(decomposition['weekly_profile'])[..., steps % WEEKLY]
+    yearly = np.asarray(decomposition['yearly_profile'])[..., steps % YEARLY]
+    return weekly + yearly
+
+
+def trend_forecast(decomposition, horizon=14, window=WEEKLY):
+    """Linear extrapolation of the trend using its slope over the last `window` steps"""
+    trend = np.atleast_2d(decomposition['trend'])
+    window = min(window, trend.shape[1] - 1)
+    if window < 1:
+        slope = np.zeros(trend.shape[0])
+    else:
+        slope = (trend[:, -1] - trend[:, -1 - window]) / window
+    forecast = trend[:, -1:] + slope[:, None] * np.arange(1, horizon + 1)
+    return forecast if decomposition.get('batched') else forecast[0]
+
+
+def deseasonalize(values, decomposition):
+    """
+    Remove the seasonal components from `values`, which must be the last
+    len(values) steps of the decomposed series (e.g. the cleaned 90-day window
+    it was fit on).
+    """
+    values = np.asarray(values, dtype=float)
+    length = values.shape[-1]
+    seasonal = np.asarray(decomposition['weekly']) + np.asarray(decomposition['yearly'])
+    return values - seasonal[..., -length:]
+
+
+def data_fingerprint(series):
+    values = np.ascontiguousarray(np.asarray(series, dtype=float))
+    digest = hashlib.sha256(values.tobytes())
+    digest.update(str(values.shape).encode())
+    return digest.hexdigest()
+
+
+def get_decomposition(series, fingerprint=None):
+    """Decompose `series`, computing it only once per data fingerprint"""
+    key = fingerprint or data_fingerprint(series)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    result = decompose(series)
+
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def run_seasonal_decompose(series, horizon=14):
+    """
+    Decompose the historical series (cached per data version) and project
+    trend + seasonality forward.
+    Returns a list of dictionaries with 'ds' and 'yhat' (empty without data).
+    """
+    if series is None or len(series) == 0:
+        return []
+
+    decomposition = get_decomposition(series)
+    yhat = np.atleast_1d(trend_forecast(decomposition, horizon) + seasonal_forecast(decomposition, horizon))
+    dates = [datetime.now() + timedelta(days=i + 1) for i in range(horizon)]
+    return [{"ds": d, "yhat": float(v)} for d, v in zip(dates, yhat)]
@@ -0,0 +1,132 @@
+"""
+Semantic cache for /chat completions.
+
+Many chat questions are paraphrases of each other. Answers are cached per role
+with the query embedding already computed for RAG; a new question whose
+embedding is within SIMILARITY_THRESHOLD (cosine) of a cached one reuses its
+answer instead of calling Groq.
+
+Every entry is tied to the version of the live patient snapshot it was
+generated from. Entries for an older version are dropped as soon as a newer
+one is seen, so an answer is never reused after the patient data behind it has
+changed. Entries also record which prompt context (selected patients,
+retrieved documents) they were answered with, and only match a question
+assembled with the same context.
+
+Environment:
+    CHAT_CACHE_ENABLED     '0' disables the cache (default '1')
+    CHAT_CACHE_THRESHOLD   minimum cosine similarity for a hit (default 0.95)
+    CHAT_CACHE_TTL         seconds an answer stays valid (default 600)
+    CHAT_CACHE_SIZE        max answers kept per role, least recently used evicted (default 256)
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("CHAT_CACHE_ENABLED", "1") != "0"
+SIMILARITY_THRESHOLD = float(os.getenv("CHAT_CACHE_THRESHOLD", "0.95"))
+TTL = float(os.getenv("CHAT_CACHE_TTL", "600"))
+MAX_ENTRIES = int(os.getenv("CHAT_CACHE_SIZE", "256"))
+
+
+def context_version(*parts):
+    """Hash of the data or prompt context an answer depends on"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SemanticCache:
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, ttl=TTL, max_entries=MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._roles = {}  # role -> OrderedDict(entry id -> entry), oldest use first
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _prune(self, entries, version, now):
+        """Drop expired entries and entries built from another snapshot version"""
+        stale = [key for key, entry in entries.items()
+                 if entry["version"] != version or now - entry["created"] > self.ttl]
+        for key in stale:
+            if entries[key]["version"] != version:
+                self.invalidated += 1
+            del entries[key]
+
+    def lookup(self, role, vector, version, context=""):
+        """Cached answer for a similar question under the same snapshot version and context, or None"""
+        now = time.time()
+        query = self._unit(vector)
+        with self._lock:
+            entries = self._roles.get(role)
+            if entries:
+                self._prune(entries, version, now)
+            keys = [k for k in entries or () if entries[k]["context"] == context]
+            if not keys:
+                self.misses += 1
+                return None
+            similarity = np.stack([entries[k]["vector"] for k in keys]) @ query
+            best = int(np.argmax(similarity))
+            if similarity[best] < self.threshold:
+                self.misses += 1
+                return None
+            entries.move_to_end(keys[best])
+            self.hits += 1
+            return entries[keys[best]]["answer"]
+
+    def store(self, role, vector, version, answer, context=""):
+        with self._lock:
+            entries = self._roles.setdefault(role, OrderedDict())
+            self._prune(entries, version, time.time())
+            entries[self._next_id] = {
+                "vector": self._unit(vector),
+                "version": version,
+                "context": context,
+                "answer": answer,
+                "created": time.time(),
+            }
+            self._next_id += 1
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": ENABLED,
+                "entries": {role: len(entries) for role, entries in self._roles.items()},
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "invalidated": self.invalidated,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl,
+            }
+
+
+_cache = None
+
+def get_semantic_cache():
+    global _cache
+    if _cache is None:
+        _cache = SemanticCache()
+    return _cache
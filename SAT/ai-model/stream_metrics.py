@@ -0,0 +1,57 @@
+"""
+Latency metrics for streamed chat completions.
+
+Keeps a rolling window of recent streams: time to first token, total
+duration, tokens generated and whether the client hung up early.
+
+Environment:
+    STREAM_METRICS_WINDOW   streams kept for percentiles (default 500)
+"""
+
+import os
+import threading
+from collections import deque
+
+import numpy as np
+
+WINDOW = int(os.getenv("STREAM_METRICS_WINDOW", "500"))
+
+
+class StreamMetrics:
+    def __init__(self, window=WINDOW):
+        self._streams = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.total = 0
+        self.cancelled = 0
+
+    def record(self, ttft_ms, total_ms, tokens, cancelled=False):
+        with self._lock:
+            self._streams.append((ttft_ms, total_ms, tokens))
+            self.total += 1
+            self.cancelled += int(cancelled)
+
+    def stats(self):
+        with self._lock:
+            streams = list(self._streams)
+            summary = {"streams": self.total, "cancelled": self.cancelled, "window": len(streams)}
+        ttft = np.array([s[0] for s in streams if s[0] is not None], dtype=float)
+        total = np.array([s[1] for s in streams], dtype=float)
+        tokens = np.array([s[2] for s in streams], dtype=float)
+        if len(ttft):
+            summary["ttft_ms_p50"] = round(float(np.percentile(ttft, 50)), 1)
+            summary["ttft_ms_p95"] = round(float(np.percentile(ttft, 95)), 1)
+        if len(total):
+            summary["total_ms_p50"] = round(float(np.percentile(total, 50)), 1)
+            summary["avg_tokens"] = round(float(tokens.mean()), 1)
+            seconds = total.sum() / 1000.0
+            summary["tokens_per_second"] = round(float(tokens.sum() / seconds), 1) if seconds else 0.0
+        return summary
+
+
+_metrics = None
+
+def get_stream_metrics():
+    global _metrics
+    if _metrics is None:
+        _metrics = StreamMetrics()
+    return _metrics
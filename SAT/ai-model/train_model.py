@@ -1,21 +1,28 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error
-import joblib
 import os
+import time
+import argparse
 from huggingface_hub import HfApi, upload_file
 import logging
+from feature_store import feature_columns, load_or_build_features, resolve_driver_column
+from model_registry import publish_bundle, current_version, VERSIONS_DIR, BUNDLE_FILENAME, MANIFEST_FILENAME
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 DATA_PATH = os.path.join(os.path.dirname(__file__), "../data/MASTER_DF1.csv")
-MODEL_PATH = "trained_model.joblib"
 HF_REPO_ID = "harshpatel/medicast-forecaster" # Replace with user's actual repo if known, or generic
 
+# 'exact': RandomForest + exact-split GradientBoosting (original behaviour)
+# 'hist':  RandomForest + histogram GradientBoosting with early stopping
+TRAINING_BACKENDS = ('exact', 'hist')
+TRAINING_BACKEND = os.getenv("TRAINING_BACKEND", "exact")
+
 def load_and_preprocess_data():
     logger.info("Loading data...")
     if not os.path.exists(DATA_PATH):
@@ -28,52 +35,48 @@ def load_and_preprocess_data():
         df['date'] = pd.to_datetime(df['date'])
         df = df.sort_values('date')
     
-    # Assume 'value' is the target column. If not, we might need to adjust based on actual CSV structure.
-    # For now, let's assume a simple structure or try to find the target.
-    # If MASTER_DF has multiple columns, we'll try to identify the target.
-    target_col = 'value'
-    if target_col not in df.columns:
-        # Fallback: use the last column or a specific one if known. 
-        # Let's check if 'admissions' or similar exists.
-        possible_targets = ['admissions', 'count', 'demand', 'y']
-        for col in possible_targets:
-            if col in df.columns:
-                target_col = col
-                break
-        else:
-            # If still not found, use the last numeric column
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            if len(numeric_cols) > 0:
-                target_col = numeric_cols[-1]
-            else:
-                raise ValueError("No suitable target column found in data")
-    
+    target_col = resolve_driver_column(df)
     logger.info(f"Using target column: {target_col}")
     
-    # Feature Engineering
+    # Feature Engineering (shared with serving, cached by data fingerprint)
     logger.info("Generating features...")
-    df['day_of_week'] = df['date'].dt.dayofweek
-    df['month'] = df['date'].dt.month
+    features = load_or_build_features(df, target_col)
+    df = pd.concat([df.reset_index(drop=True), features], axis=1)
     
-    # Lag features
-    for lag in [1, 7, 14, 30]:
-        df[f'lag_{lag}'] = df[target_col].shift(lag)
+    # Drop warm-up rows without full lag/rolling history
+    df = df.dropna(subset=feature_columns())
     
-    # Rolling means
-    for window in [7, 30]:
-        df[f'rolling_mean_{window}'] = df[target_col].rolling(window=window).mean()
+    return df, target_col
+
+def build_estimators(backend=TRAINING_BACKEND):
+    """Return unfitted (rf_model, gb_model) for the selected training backend"""
+    if backend not in TRAINING_BACKENDS:
+        raise ValueError(f"Unknown training backend '{backend}'. Choose from {TRAINING_BACKENDS}")
     
-    # Drop NaNs created by lags
-    df = df.dropna()
+    rf_model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
     
-    return df, target_col
+    if backend == 'hist':
+        # Bins features once (max 255 bins) instead of sorting at every split,
+        # and stops adding trees once the held-out loss stops improving
+        gb_model = HistGradientBoostingRegressor(
+            max_iter=500,
+            learning_rate=0.1,
+            early_stopping=True,
+            validation_fraction=0.1,
+            n_iter_no_change=20,
+            random_state=42
+        )
+    else:
+        gb_model = GradientBoostingRegressor(n_estimators=100, random_state=42)
+    
+    return rf_model, gb_model
 
-def train_model_for_target(df, target_col):
-    logger.info(f"🎯 Training models for target: {target_col}")
+def train_model_for_target(df, target_col, backend=TRAINING_BACKEND):
+    logger.info(f"🎯 Training models for target: {target_col} (backend: {backend})")
     
-    # Select only numeric columns for features
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    features = [col for col in numeric_cols if col not in [target_col, 'date']]
+    # Only the engineered features are available at serving time
+    df = df.dropna(subset=[target_col])
+    features = feature_columns()
     X = df[features]
     y = df[target_col]
     
@@ -82,16 +85,19 @@ def train_model_for_target(df, target_col):
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
     
+    rf_model, gb_model = build_estimators(backend)
+    
     # Train Random Forest
     logger.info("Training Random Forest...")
-    rf_model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+    start = time.perf_counter()
     rf_model.fit(X_train, y_train)
+    rf_fit_seconds = time.perf_counter() - start
     
     # Train Gradient Boosting
     logger.info("Training Gradient Boosting...")
-    from sklearn.ensemble import GradientBoostingRegressor
-    gb_model = GradientBoostingRegressor(n_estimators=100, random_state=42)
+    start = time.perf_counter()
     gb_model.fit(X_train, y_train)
+    gb_fit_seconds = time.perf_counter() - start
     
     # Evaluate
     rf_pred = rf_model.predict(X_test)
@@ -105,10 +111,7 @@ def train_model_for_target(df, target_col):
     logger.info(f"Random Forest MAE: {rf_mae:.2f}")
     logger.info(f"Gradient Boosting MAE: {gb_mae:.2f}")
     logger.info(f"Ensemble MAE: {ensemble_mae:.2f}")
-    
-    # Save models with target suffix
-    suffix = target_col.replace('new_', '').replace('_units_used', '').replace('_admissions', '')
-    if suffix == 'admissions': suffix = 'admissions' # Handle edge case if needed, but 'new_admissions' -> 'admissions' is fine
+    logger.info(f"Fit time: RF {rf_fit_seconds:.2f}s, GB {gb_fit_seconds:.2f}s")
     
     # Map full column names to simple suffixes
     name_map = {
@@ -118,16 +121,22 @@ def train_model_for_target(df, target_col):
     }
     simple_name = name_map.get(target_col, target_col)
     
-    logger.info(f"Saving models for {simple_name}...")
-    joblib.dump(rf_model, f"trained_model_rf_{simple_name}.joblib")
-    joblib.dump(gb_model, f"trained_model_gb_{simple_name}.joblib")
-    
-    # Save feature names for inference (only need once really, but safe to overwrite)
-    joblib.dump(features, "model_features.joblib")
-    
-    return True
+    models = {
+        f'{simple_name}_rf': rf_model,
+        f'{simple_name}_gb': gb_model
+    }
+    metrics = {
+        'rf_mae': float(rf_mae),
+        'gb_mae': float(gb_mae),
+        'ensemble_mae': float(ensemble_mae),
+        'rf_fit_seconds': float(rf_fit_seconds),
+        'gb_fit_seconds': float(gb_fit_seconds),
+        'n_train': int(len(X_train)),
+        'n_test': int(len(X_test))
+    }
+    return models, metrics
 
-def train_all_models():
+def train_all_models(backend=TRAINING_BACKEND):
     try:
         df, _ = load_and_preprocess_data()
         
@@ -139,13 +148,24 @@ def train_all_models():
             logger.error("❌ No valid targets found in dataset")
             return False
             
-        success = True
+        # Collect every target first, then publish them together as one bundle
+        models = {}
+        metrics = {}
         for target in available_targets:
-            if not train_model_for_target(df, target):
-                success = False
+            target_models, target_metrics = train_model_for_target(df, target, backend=backend)
+            models.update(target_models)
+            metrics[target] = target_metrics
+        
+        version = publish_bundle(models, feature_columns(), metadata={
+            'data_path': DATA_PATH,
+            'targets': available_targets,
+            'backend': backend,
+            'n_samples': int(len(df)),
+            'metrics': metrics
+        })
         
-        logger.info("✅ Multi-target training complete")
-        return success
+        logger.info(f"✅ Multi-target training complete (model version {version})")
+        return True
         
     except Exception as e:
         logger.error(f"❌ Training failed: {e}")
@@ -177,25 +197,81 @@ def upload_to_huggingface():
         except Exception as e:
             logger.warning(f"Could not create repo {repo_id}: {e}")
         
-        upload_file(
-            path_or_fileobj=MODEL_PATH,
-            path_in_repo="trained_model.joblib",
-            repo_id=repo_id,
-            token=token
-        )
+        version = current_version()
+        if version is None:
+            logger.warning("⚠️  No published model bundle found. Nothing to upload.")
+            return
         
-        upload_file(
-            path_or_fileobj="model_features.joblib",
-            path_in_repo="model_features.joblib",
-            repo_id=repo_id,
-            token=token
-        )
+        version_dir = os.path.join(VERSIONS_DIR, version)
+        for filename in [BUNDLE_FILENAME, MANIFEST_FILENAME]:
+            upload_file(
+                path_or_fileobj=os.path.join(version_dir, filename),
+                path_in_repo=filename,
+                repo_id=repo_id,
+                token=token,
+                commit_message=f"Model bundle {version}"
+            )
         
         logger.info(f"✅ Model uploaded successfully to https://huggingface.co/{repo_id}")
         
     except Exception as e:
         logger.error(f"❌ Failed to upload to Hugging Face: {e}")
 
+def benchmark_backends(predict_repeats=200):
+    """
+    Compare the training backends on the master data.
+    Reports fit time, single-row predict latency (what recursive serving does)
+    and hold-out MAE of the gradient-boosting estimator for every target.
+    """
+    df, _ = load_and_preprocess_data()
+    targets = [t for t in ['new_admissions', 'icu_admissions', 'oxygen_units_used'] if t in df.columns]
+    features = feature_columns()
+    results = []
+    
+    for target in targets:
+        target_df = df.dropna(subset=[target])
+        X_train, X_test, y_train, y_test = train_test_split(
+            target_df[features], target_df[target], test_size=0.2, shuffle=False
+        )
+        single_row = X_test.iloc[[0]]
+        
+        for backend in TRAINING_BACKENDS:
+            _, gb_model = build_estimators(backend)
+            
+            start = time.perf_counter()
+            gb_model.fit(X_train, y_train)
+            fit_seconds = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            for _ in range(predict_repeats):
+                gb_model.predict(single_row)
+            predict_ms = (time.perf_counter() - start) / predict_repeats * 1000
+            
+            mae = mean_absolute_error(y_test, gb_model.predict(X_test))
+            results.append({
+                'target': target,
+                'backend': backend,
+                'fit_seconds': fit_seconds,
+                'predict_ms': predict_ms,
+                'mae': mae
+            })
+    
+    print(f"\nBenchmark on {len(df)} rows ({DATA_PATH})")
+    print(f"{'target':<20}{'backend':<10}{'fit (s)':>10}{'predict (ms)':>15}{'MAE':>10}")
+    for r in results:
+        print(f"{r['target']:<20}{r['backend']:<10}{r['fit_seconds']:>10.3f}{r['predict_ms']:>15.3f}{r['mae']:>10.2f}")
+    
+    return results
+
 if __name__ == "__main__":
-    if train_all_models():
+    parser = argparse.ArgumentParser(description="Train the multi-target forecasting models")
+    parser.add_argument("--backend", choices=TRAINING_BACKENDS, default=TRAINING_BACKEND,
+                        help="Estimator backend (default: $TRAINING_BACKEND or 'exact')")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Compare backends on the master data instead of training")
+    args = parser.parse_args()
+    
+    if args.benchmark:
+        benchmark_backends()
+    elif train_all_models(backend=args.backend):
         upload_to_huggingface()
@@ -0,0 +1,320 @@
+"""
+Read-optimized, memory-mapped copy of the RAG collection.
+
+Qdrant stays the source of truth for writes. After ingestion the collection is
+exported to a versioned directory:
+
+    VECTOR_INDEX_DIR/<version>/vectors.npy          (n, dim) float16, L2-normalized
+    VECTOR_INDEX_DIR/<version>/payloads.jsonl       one JSON record per row
+    VECTOR_INDEX_DIR/<version>/payload_offsets.npy  byte offset of each record
+    VECTOR_INDEX_DIR/<version>/category_codes.npy   per-row index into categories.json
+    VECTOR_INDEX_DIR/<version>/categories.json      payload 'category' values
+    VECTOR_INDEX_DIR/<version>/centroids.npy        IVF only
+    VECTOR_INDEX_DIR/<version>/list_offsets.npy     IVF only: rows of list i are
+                                                    list_offsets[i]:list_offsets[i+1]
+    VECTOR_INDEX_DIR/CURRENT                        name of the live version
+
+A version is written under .tmp-<version> and renamed into place only once
+complete, so a crashed export never becomes live or displaces a good version.
+
+Every worker process maps the same files read-only, so the OS page cache holds
+one shared copy. Top-k is a blocked matrix-vector product over all rows, or over
+the `nprobe` closest IVF lists once the corpus is large enough to be
+partitioned. Category filters are applied to the scores before top-k; with IVF,
+further lists are probed until enough rows of the allowed categories are found.
+Only the payloads of the returned hits are read from disk.
+
+Environment:
+    VECTOR_INDEX_DIR   where index versions are written (default ./vector_index)
+
+Usage:
+    python vector_index.py                 # export healthcare_docs from ./qdrant_data
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_DIR = os.getenv(
+    "VECTOR_INDEX_DIR", os.path.join(os.path.dirname(__file__), "vector_index")
+)
+# Build IVF lists from this many vectors on; probe this many lists per query
+IVF_MIN_VECTORS = 50000
+DEFAULT_NPROBE = 8
+KMEANS_ITERATIONS = 10
+# Rows upcast to float32 at a time during scoring
+SCORE_BLOCK = 16384
+# Seconds between checks of CURRENT for a newer export
+RELOAD_INTERVAL = 30.0
+KEEP_VERSIONS = 2
+# Versions still being written; never loaded or pruned
+TMP_PREFIX = ".tmp-"
+
+# Same fields as qdrant_client's ScoredPoint that callers use
+Hit = namedtuple("Hit", ["id", "score", "payload"])
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+def _kmeans(vectors, n_lists, iterations=KMEANS_ITERATIONS, seed=0):
+    """Spherical k-means (cosine) on normalized float32 vectors. Returns (centroids, assignment)."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = np.bincount(assignment, minlength=n_lists) == 0
+        # Re-seed empty lists from random vectors
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+def export_collection(client, collection_name, index_dir=VECTOR_INDEX_DIR,
+                      ivf_min_vectors=IVF_MIN_VECTORS, n_lists=None):
+    """Scroll `collection_name` out of Qdrant into a new index version and make it live"""
+    ids, vectors, payloads = [], [], []
+    offset = None
+    while True:
+        records, offset = client.scroll(collection_name=collection_name, limit=1024,
+                                        offset=offset, with_payload=True, with_vectors=True)
+        for record in records:
+            ids.append(str(record.id))
+            vectors.append(record.vector)
+            payloads.append(record.payload or {})
+        if offset is None:
+            break
+
+    version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    path = os.path.join(index_dir, TMP_PREFIX + version)
+    os.makedirs(path)
+    try:
+        _write_version(path, ids, vectors, payloads, ivf_min_vectors, n_lists)
+    except BaseException:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    final_path = os.path.join(index_dir, version)
+    os.replace(path, final_path)
+
+    # Publish atomically, then drop old complete versions
+    tmp_pointer = os.path.join(index_dir, "CURRENT.tmp")
+    with open(tmp_pointer, "w") as f:
+        f.write(version)
+    os.replace(tmp_pointer, os.path.join(index_dir, "CURRENT"))
+    versions = sorted(v for v in os.listdir(index_dir)
+                      if not v.startswith(TMP_PREFIX) and os.path.isdir(os.path.join(index_dir, v)))
+    for old in versions[:-KEEP_VERSIONS]:
+        if old != version:
+            shutil.rmtree(os.path.join(index_dir, old), ignore_errors=True)
+
+    logger.info(f"✅ Exported {len(ids)} vectors to {final_path}"
+                f"{' with IVF' if len(ids) >= ivf_min_vectors else ''}")
+    return version
+
+
+def _write_version(path, ids, vectors, payloads, ivf_min_vectors, n_lists):
+    """Write the files of one index version into `path`"""
+    matrix = _normalize(np.asarray(vectors, dtype=np.float32)) if vectors else np.zeros((0, 0), np.float32)
+    order = np.arange(len(ids))
+    if len(ids) >= ivf_min_vectors:
+        n_lists = n_lists or int(np.sqrt(len(ids)))
+        centroids, assignment = _kmeans(matrix, n_lists)
+        # Store rows grouped by list so each list is one contiguous slice
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=n_lists)
+        np.save(os.path.join(path, "centroids.npy"), centroids.astype(np.float32))
+        np.save(os.path.join(path, "list_offsets.npy"), np.concatenate([[0], np.cumsum(counts)]))
+
+    np.save(os.path.join(path, "vectors.npy"), matrix[order].astype(np.float16))
+    offsets = np.zeros(len(ids), dtype=np.int64)
+    with open(os.path.join(path, "payloads.jsonl"), "wb") as f:
+        for row, i in enumerate(order):
+            offsets[row] = f.tell()
+            f.write(json.dumps({"id": ids[i], "payload": payloads[i]}).encode("utf-8") + b"\n")
+    np.save(os.path.join(path, "payload_offsets.npy"), offsets)
+    categories = sorted({str(p.get("category", "")) for p in payloads})
+    codes = {name: code for code, name in enumerate(categories)}
+    np.save(os.path.join(path, "category_codes.npy"),
+            np.array([codes[str(payloads[i].get("category", ""))] for i in order], dtype=np.int32))
+    with open(os.path.join(path, "categories.json"), "w") as f:
+        json.dump(categories, f)
+
+
+def current_version(index_dir=VECTOR_INDEX_DIR):
+    """Name of the live version in `index_dir`, or None if nothing has been exported"""
+    try:
+        with open(os.path.join(index_dir, "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+class VectorIndex:
+    """One mapped index version. Read-only and safe to share between threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.payload_offsets = np.load(os.path.join(path, "payload_offsets.npy"), mmap_mode="r")
+        self.category_codes = np.load(os.path.join(path, "category_codes.npy"), mmap_mode="r")
+        with open(os.path.join(path, "categories.json")) as f:
+            self.categories = {name: code for code, name in enumerate(json.load(f))}
+        self.category_counts = np.bincount(self.category_codes, minlength=len(self.categories))
+        centroids = os.path.join(path, "centroids.npy")
+        if os.path.exists(centroids):
+            self.centroids = np.load(centroids)
+            self.list_offsets = np.load(os.path.join(path, "list_offsets.npy"))
+        else:
+            self.centroids = None
+            self.list_offsets = None
+        self._payload_file = open(os.path.join(path, "payloads.jsonl"), "rb")
+        self._file_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def close(self):
+        with self._file_lock:
+            self._payload_file.close()
+
+    def __del__(self):
+        # Also reached when an IndexReader swaps versions and the last search
+        # on the old one finishes
+        payload_file = getattr(self, "_payload_file", None)
+        if payload_file is not None:
+            payload_file.close()
+
+    def _score_rows(self, query, start, stop):
+        scores = np.empty(stop - start, dtype=np.float32)
+        for block in range(start, stop, SCORE_BLOCK):
+            end = min(block + SCORE_BLOCK, stop)
+            scores[block - start:end - start] = self.vectors[block:end].astype(np.float32) @ query
+        return scores
+
+    def _record(self, row):
+        with self._file_lock:
+            self._payload_file.seek(int(self.payload_offsets[row]))
+            return json.loads(self._payload_file.readline())
+
+    def search(self, query_vector, limit=2, nprobe=DEFAULT_NPROBE, categories=None, fields=None):
+        """
+        Top-`limit` rows by cosine similarity, as Hit(id, score, payload).
+        `categories` restricts hits to those payload categories; `fields`
+        trims each payload to the listed keys.
+        """
+        if len(self) == 0:
+            return []
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        allowed = None
+        if categories is not None:
+            allowed = [self.categories[c] for c in categories if c in self.categories]
+            # Rows that can match at all, so probing stops once they are all seen
+            limit = min(limit, int(self.category_counts[allowed].sum()))
+
+        if self.centroids is None:
+            rows = np.arange(len(self))
+            scores = self._score_rows(query, 0, len(self))
+            if allowed is not None:
+                keep = np.isin(self.category_codes, allowed)
+                rows, scores = rows[keep], scores[keep]
+        else:
+            # Probe the `nprobe` closest lists, and further ones until a
+            # category filter has left at least `limit` rows
+            row_parts, score_parts, found = [], [], 0
+            for probed, i in enumerate(np.argsort(self.centroids @ query)[::-1], 1):
+                a, b = int(self.list_offsets[i]), int(self.list_offsets[i + 1])
+                list_rows, list_scores = np.arange(a, b), self._score_rows(query, a, b)
+                if allowed is not None:
+                    keep = np.isin(self.category_codes[a:b], allowed)
+                    list_rows, list_scores = list_rows[keep], list_scores[keep]
+                row_parts.append(list_rows)
+                score_parts.append(list_scores)
+                found += len(list_rows)
+                if probed >= nprobe and found >= limit:
+                    break
+            rows, scores = np.concatenate(row_parts), np.concatenate(score_parts)
+
+        limit = min(limit, len(scores))
+        if limit == 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        hits = []
+        for i in top:
+            record = self._record(int(rows[i]))
+            payload = record["payload"]
+            if fields is not None:
+                payload = {k: payload[k] for k in fields if k in payload}
+            hits.append(Hit(record["id"], float(scores[i]), payload))
+        return hits
+
+
+class IndexReader:
+    """Follows CURRENT and swaps to a newer export when one is published"""
+
+    def __init__(self, index_dir=VECTOR_INDEX_DIR, reload_interval=RELOAD_INTERVAL):
+        self.index_dir = index_dir
+        self.reload_interval = reload_interval
+        self._index = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """The live VectorIndex, or None if nothing has been exported"""
+        now = time.monotonic()
+        if self._index is not None and now - self._checked_at < self.reload_interval:
+            return self._index
+        with self._lock:
+            self._checked_at = now
+            version = current_version(self.index_dir)
+            if version and version != self._version:
+                try:
+                    # The replaced index is not closed here: searches still
+                    # running on it finish first, and it closes its payload
+                    # file once the last reference is dropped.
+                    self._index = VectorIndex(os.path.join(self.index_dir, version))
+                    self._version = version
+                    logger.info(f"🔁 Vector index {version} loaded ({len(self._index)} vectors)")
+                except Exception as e:
+                    logger.warning(f"⚠️  Could not load vector index {version}: {e}")
+            return self._index
+
+
+_reader = None
+
+def get_vector_index():
+    """Process-wide live index (None until an export exists)"""
+    global _reader
+    if _reader is None:
+        _reader = IndexReader()
+    return _reader.get()
+
+
+if __name__ == '__main__':
+    import argparse
+    from qdrant_client import QdrantClient
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Export the RAG collection to a memory-mapped index")
+    parser.add_argument("--collection", default="healthcare_docs")
+    parser.add_argument("--qdrant-path", default="./qdrant_data")
+    parser.add_argument("--ivf-min", type=int, default=IVF_MIN_VECTORS, help="vectors before IVF is used")
+    args = parser.parse_args()
+
+    url = os.getenv("QDRANT_URL")
+    client = QdrantClient(url=url) if url else QdrantClient(path=args.qdrant_path)
+    export_collection(client, args.collection, ivf_min_vectors=args.ivf_min)
@@ -67,12 +67,52 @@ export const chatWithAI = async (req: Request, res: Response) => {
     }
 };
 
+// Proxy to Python Service for streamed Chat (Server-Sent Events)
+export const chatWithAIStream = async (req: Request, res: Response) => {
+    // Closing the upstream connection when the browser goes away lets the
+    // AI service cancel its Groq completion
+    const controller = new AbortController();
+    res.on('close', () => controller.abort());
+
+    try {
+        const response = await axios.post(`${AI_SERVICE_URL}/chat/stream`, req.body, {
+            timeout: REQUEST_TIMEOUT,
+            responseType: 'stream',
+            signal: controller.signal
+        });
+        res.setHeader('Content-Type', 'text/event-stream');
+        res.setHeader('Cache-Control', 'no-cache');
+        res.setHeader('Connection', 'keep-alive');
+        res.flushHeaders();
+        response.data.pipe(res);
+    } catch (error: any) {
+        if (axios.isCancel(error)) {
+            return;
+        }
+        console.error('AI Chat Stream Error:', error.message);
+
+        if (error.code === 'ECONNREFUSED') {
+            return res.status(503).json({
+                message: 'AI Chat service is currently unavailable. Please try again later.',
+                error: 'Service connection refused'
+            });
+        }
+
+        res.status(500).json({
+            message: 'Chat unavailable',
+            error: error.message
+        });
+    }
+};
+
 // Proxy to Python Service for Forecasting
 export const getForecast = async (req: Request, res: Response) => {
     try {
         // Extract query parameters
         const role = (req.query.role as string) || 'public';
         const horizon = parseInt(req.query.horizon as string) || 14;
+        const mode = req.query.mode as string | undefined; // fast | standard | full (AI service default)
+        const hospitalId = req.query.hospital_id as string | undefined; // per-hospital ensemble tracking
 
         // Validate role
         const validRoles = ['public', 'hospital_staff', 'pharmacy', 'admin'];
@@ -104,7 +144,12 @@ export const getForecast = async (req: Request, res: Response) => {
 
         // Call AI service
         const response = await axios.get(`${AI_SERVICE_URL}/predict/final`, {
-            params: { role, horizon },
+            params: {
+                role,
+                horizon,
+                ...(mode ? { mode } : {}),
+                ...(hospitalId ? { hospital_id: hospitalId } : {})
+            },
             timeout: REQUEST_TIMEOUT,
             validateStatus: (status) => status < 500 // Don't throw on 4xx errors
         });
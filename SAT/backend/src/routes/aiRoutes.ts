@@ -1,5 +1,5 @@
 import express from 'express';
-import { getPrediction, chatWithAI, getForecast } from '../controllers/aiController';
+import { getPrediction, chatWithAI, chatWithAIStream, getForecast } from '../controllers/aiController';
 import { protect } from '../middleware/authMiddleware';
 
 const router = express.Router();
@@ -7,6 +7,7 @@ const router = express.Router();
 // AI Prediction Routes
 router.post('/predict', protect, getPrediction);
 router.post('/chat', protect, chatWithAI);
+router.post('/chat/stream', protect, chatWithAIStream);
 // Make forecast public for demo - remove protect middleware
 router.get('/forecast', protect, getForecast);
 